@@ -0,0 +1,122 @@
+"""
+JSON-lines Log Writer
+======================
+Appends parsed posts to a JSON-lines file from a background task, so the
+message handlers only serialize and enqueue.  Shared by both parsers.
+
+Usage:
+    from json_log import JsonLogWriter
+
+    json_log = JsonLogWriter(JSON_LOG_PATH)
+    json_log.save(post)      # post: a ParsedPost with to_dict()
+    await json_log.close()   # at shutdown: flush and stop the writer
+
+Lines are serialized with orjson when it is installed, json otherwise.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("json_log")
+
+# Serialized lines waiting for the writer task
+_JSON_QUEUE_SIZE = 10_000
+_JSON_BATCH_MAX = 512           # stays well under IOV_MAX for os.writev
+_CLOSE = b""                    # queued by close(); real lines end in b"\n"
+
+
+def _dump_line(post: Any) -> bytes:
+    """One UTF-8 JSON line for *post* (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(post, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(post.to_dict(), ensure_ascii=False).encode() + b"\n"
+
+
+def _write_batch(fd: int, chunks: list[bytes]) -> None:
+    if hasattr(os, "writev"):
+        os.writev(fd, chunks)
+    else:
+        os.write(fd, b"".join(chunks))
+
+
+async def _json_writer(path: str, queue: asyncio.Queue[bytes]) -> None:
+    """Append queued lines to *path*, one write call per batch, until _CLOSE."""
+    # The syscalls run in a worker thread so a slow disk never stalls the loop
+    try:
+        fd = await asyncio.to_thread(
+            os.open, path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644,
+        )
+    except OSError as exc:
+        logger.error("JSON log open failed: %s", exc)
+        return
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            line = await queue.get()
+            chunks: list[bytes] = []
+            while line != _CLOSE:
+                chunks.append(line)
+                if len(chunks) >= _JSON_BATCH_MAX or queue.empty():
+                    break
+                line = queue.get_nowait()
+            if chunks:
+                pending = asyncio.ensure_future(
+                    asyncio.to_thread(_write_batch, fd, chunks)
+                )
+                try:
+                    await asyncio.shield(pending)
+                except OSError as exc:
+                    logger.error("JSON write failed: %s", exc)
+            if line == _CLOSE:
+                return
+    finally:
+        # Cancellation leaves a shielded write running; the fd must outlive it
+        if pending is not None and not pending.done():
+            await asyncio.wait([pending])
+        os.close(fd)
+
+
+class JsonLogWriter:
+    """
+    Queue posts for a writer task appending to *path*.  The task starts on
+    the first :meth:`save` call, inside the running event loop.  An empty
+    *path* turns :meth:`save` into a no-op.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._queue: Optional[asyncio.Queue[bytes]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def save(self, post: Any) -> None:
+        """Queue *post* for the background writer."""
+        if not self.path:
+            return
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=_JSON_QUEUE_SIZE)
+            self._task = asyncio.get_running_loop().create_task(
+                _json_writer(self.path, self._queue)
+            )
+        try:
+            self._queue.put_nowait(_dump_line(post))
+        except asyncio.QueueFull:
+            logger.error("JSON queue full, dropping msg #%s", post.message_id)
+
+    async def close(self) -> None:
+        """Write out every queued line, then stop the writer task."""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        await self._queue.put(_CLOSE)
+        await task
@@ -0,0 +1,153 @@
+"""
+Log-chat Batcher
+=================
+Coalesces text-only summaries bound for the same log chat into grouped
+messages, so a burst of posts costs one API call per batch instead of one
+call per post.
+
+Usage:
+    from log_batcher import LogChatBatcher
+
+    async def send(text: str) -> None:
+        await client.send_message(log_chat, text, parse_mode="html")
+
+    batcher = LogChatBatcher(send)
+    await batcher.process(parsed_html)   # resolves once its batch is sent
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger("log_batcher")
+
+T = TypeVar("T")
+
+# Telegram's limit for a single text message
+TELEGRAM_TEXT_LIMIT = 4096
+
+BATCH_SEPARATOR = "\n\n———\n\n"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Generic batcher
+# ═══════════════════════════════════════════════════════════════════════════
+
+class AsyncBatcher(ABC, Generic[T]):
+    """
+    Collect items passed to :meth:`process` and hand them to
+    :meth:`process_batch` in groups.
+
+    A batch is flushed when it reaches *max_batch_size* items or when the
+    oldest queued item has waited *max_queue_time* seconds.
+    """
+
+    def __init__(self, *, max_batch_size: int = 10, max_queue_time: float = 0.5) -> None:
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self._queue: list[tuple[T, asyncio.Future]] = []
+        self._timer: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+
+    async def process(self, item: T) -> Any:
+        """Queue *item* and wait for the result of its batch."""
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.append((item, fut))
+        if len(self._queue) >= self.max_batch_size:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return await fut
+
+    @abstractmethod
+    async def process_batch(self, items: list[T]) -> list[Any]:
+        """
+        Handle one batch.  Return one result per item; an exception instance
+        in the list is raised to that item's caller.
+        """
+
+    # ── internals ─────────────────────────────────────────────────────────
+
+    def _take(self) -> list[tuple[T, asyncio.Future]]:
+        batch, self._queue = self._queue, []
+        return batch
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.create_task(self._run(self._take()))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_queue_time)
+        self._timer = None
+        await self._run(self._take())
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        if not batch:
+            return
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except Exception as exc:
+            results = [exc] * len(batch)
+        for (_, fut), res in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(res, BaseException):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Log-chat text batcher
+# ═══════════════════════════════════════════════════════════════════════════
+
+class LogChatBatcher(AsyncBatcher[str]):
+    """
+    Join queued HTML payloads with :data:`BATCH_SEPARATOR` and send them
+    through *send*, one message per group that fits Telegram's text limit.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[Any]],
+        *,
+        max_batch_size: int = 10,
+        max_queue_time: float = 0.5,
+        limit: int = TELEGRAM_TEXT_LIMIT,
+    ) -> None:
+        super().__init__(max_batch_size=max_batch_size, max_queue_time=max_queue_time)
+        self._send = send
+        self._limit = limit
+
+    async def process_batch(self, items: list[str]) -> list[Any]:
+        results: list[Any] = [None] * len(items)
+        group: list[int] = []
+        length = 0
+
+        async def flush() -> None:
+            try:
+                await self._send(BATCH_SEPARATOR.join(items[i] for i in group))
+            except Exception as exc:
+                logger.error("Batched send of %d message(s) failed: %s", len(group), exc)
+                for i in group:
+                    results[i] = exc
+
+        for idx, text in enumerate(items):
+            extra = len(text) + (len(BATCH_SEPARATOR) if group else 0)
+            if group and length + extra > self._limit:
+                await flush()
+                group, length = [], 0
+                extra = len(text)
+            group.append(idx)
+            length += extra
+        if group:
+            await flush()
+
+        return results
@@ -0,0 +1,275 @@
+"""
+Media Downloader — shared pieces
+==================================
+Configuration, the MediaResult dataclass and helpers used by both
+media_downloader_telethon and media_downloader_pyrogram.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, Optional
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Configuration
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass(slots=True, frozen=True)
+class _Cfg:
+    """Settings read once at import; functions bind _CFG to a local on entry."""
+
+    # Directory where downloaded media is stored
+    download_dir: str
+
+    # Max file size to auto-download (bytes).  Files larger than this get a
+    # link only.  Default 50 MB.  Set 0 to disable the limit.
+    max_size: int
+
+    # When sending to log chat: "file" = always send file, "link" = always
+    # send link, "auto" = send file if small enough, otherwise link,
+    # "both" = send file + link when possible.
+    attach_mode: str
+
+    # Keep files on disk after sending?  "true" / "false"
+    keep_files: bool
+
+    # With keep_files off, media up to this size is downloaded into memory
+    # and uploaded from there instead of round-tripping through disk.
+    memory_threshold: int
+
+
+_CFG = _Cfg(
+    download_dir=os.getenv("DOWNLOAD_DIR", "downloads"),
+    max_size=int(os.getenv("MAX_DOWNLOAD_SIZE", str(50 * 1024 * 1024))),
+    attach_mode=os.getenv("ATTACH_MODE", "auto"),      # file | link | auto | both
+    keep_files=os.getenv("KEEP_FILES", "true").lower() in ("1", "true", "yes"),
+    memory_threshold=int(os.getenv("MEMORY_THRESHOLD", str(16 * 1024 * 1024))),
+)
+
+# Module-level aliases kept for existing imports
+DOWNLOAD_DIR: str = _CFG.download_dir
+MAX_DOWNLOAD_SIZE: int = _CFG.max_size
+ATTACH_MODE: str = _CFG.attach_mode
+KEEP_FILES: bool = _CFG.keep_files
+MEMORY_THRESHOLD: int = _CFG.memory_threshold
+
+# Maximum number of media transfers running at the same time.
+DOWNLOAD_CONCURRENCY: int = int(os.getenv("DOWNLOAD_CONCURRENCY", "6"))
+
+# A second text send for the same source message to the same chat within
+# this window is dropped.
+SEND_DEDUP_TTL = 60.0
+_SEND_DEDUP_MAX = 4096
+
+# Media captions cap at 1024 chars; leave room for the link line
+_CAPTION_LIMIT = 900
+_ELLIPSIS = "…"
+
+# Caption suffix for media that was skipped (type and size follow)
+_NOT_DL_PREFIX = "\n\n📎 <b>Media not downloaded</b> ("
+
+_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+# Gates the transfer phase of download_media()
+_download_sem = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+
+# Background download_and_attach() tasks, kept referenced until done
+_pending_tasks: set[asyncio.Task] = set()
+
+# Finished downloads are moved to CACHE_DIR/<key[:2]>/<key>/<file name>,
+# so media seen before a restart is not fetched again.
+CACHE_DIR = os.path.join(_CFG.download_dir, "cache")
+
+# media key → future for the download currently fetching it.  A second
+# request for the same media awaits that future instead of re-fetching.
+_inflight: dict[str, asyncio.Future] = {}
+
+# media key → path of its last download, least recently used first
+_PATH_CACHE_SIZE = 1024
+_path_cache: dict[str, str] = {}
+
+# (log chat, source chat id, message id) → expires_at
+_recent_sends: dict[tuple[int | str, int, int], float] = {}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Result dataclass
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass(slots=True)
+class MediaResult:
+    """Result of a media download / attach operation."""
+
+    method: str = "none"                 # "file" | "link" | "both" | "none"
+    file_path: Optional[str] = None      # local path to downloaded file
+    file_size: int = 0
+    file_name: str = ""
+    mime_type: str = ""
+    public_link: str = ""                # https://t.me/…  (public channels only)
+    media_type: str = ""                 # photo | video | document | audio | …
+    error: str = ""
+    duration_ms: int = 0                 # how long the download took
+    file_data: Optional[BinaryIO] = None # in-memory download (KEEP_FILES=false)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Helpers
+# ═══════════════════════════════════════════════════════════════════════════
+
+async def _ensure_dir(path: str) -> None:
+    await asyncio.to_thread(Path(path).mkdir, parents=True, exist_ok=True)
+
+
+def _spawn(coro) -> asyncio.Task:
+    """Schedule *coro* as a task that stays referenced until it finishes."""
+    task = asyncio.create_task(coro)
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
+    return task
+
+
+def _build_link(username: str, msg_id: int) -> str:
+    """Build a t.me link to the original message (public channels only)."""
+    return f"https://t.me/{username}/{msg_id}" if username else ""
+
+
+def _finalize_method(result: MediaResult) -> MediaResult:
+    """Set result.method from what we ended up with: a downloaded copy and/or a link."""
+    has_file = bool(result.file_path or result.file_data)
+    if has_file and result.public_link:
+        result.method = "both"
+    elif has_file:
+        result.method = "file"
+    elif result.public_link:
+        result.method = "link"
+    else:
+        result.method = "none"
+    return result
+
+
+def _release_data(result: MediaResult) -> None:
+    """Close and drop the in-memory download, if any."""
+    if result.file_data is not None:
+        result.file_data.close()
+        result.file_data = None
+
+
+def _fmt(b: int) -> str:
+    """Human-readable byte count, e.g. ``"3.4 MB"``."""
+    if b < 1024:
+        return f"{b} B"
+    # Each unit step is 1024 = 2**10, so the unit index is bit_length // 10
+    i = min((b.bit_length() - 1) // 10, len(_UNITS) - 1)
+    return f"{b / (1 << (i * 10)):.1f} {_UNITS[i]}"
+
+
+def _cache_entry(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], key)
+
+
+def _cache_lookup(key: str) -> Optional[str]:
+    """Return the cached file for *key*, or None.  Blocking."""
+    try:
+        with os.scandir(_cache_entry(key)) as it:
+            for entry in it:
+                if entry.is_file():
+                    return entry.path
+    except OSError:
+        pass
+    return None
+
+
+def _cache_store(key: str, path: str) -> str:
+    """
+    Move the finished download *path* into the cache and return its new
+    path, or *path* itself if it cannot be moved there.  Blocking.
+    """
+    entry = _cache_entry(key)
+    cached = os.path.join(entry, os.path.basename(path))
+    try:
+        os.makedirs(entry, exist_ok=True)
+        os.replace(path, cached)
+    except OSError:
+        # e.g. EXDEV when the download landed on another filesystem
+        return path
+    return cached
+
+
+async def _cached_path(key: str) -> Optional[str]:
+    """Return the remembered path for *key* if the file is still on disk."""
+    path = _path_cache.pop(key, None)
+    if path is None or not await asyncio.to_thread(os.path.exists, path):
+        return None
+    _path_cache[key] = path
+    return path
+
+
+def _remember_path(key: str, path: str) -> None:
+    _path_cache.pop(key, None)
+    if len(_path_cache) >= _PATH_CACHE_SIZE:
+        del _path_cache[next(iter(_path_cache))]
+    _path_cache[key] = path
+
+
+async def _single_flight(
+    key: Optional[str],
+    fetch: Callable[[], Awaitable[Optional[str]]],
+) -> Optional[str]:
+    """
+    Return the path for the media identified by *key*, calling *fetch* only
+    if the file is not already on disk or in the cache and no download of it
+    is in flight.
+
+    Concurrent callers share the in-flight download; if it fails they fall
+    back to fetching on their own.  A *key* of None disables sharing and
+    caching.
+    """
+    if key is None:
+        return await fetch()
+
+    path = await _cached_path(key)
+    if path is not None:
+        return path
+
+    fut = _inflight.get(key)
+    if fut is not None:
+        path = await asyncio.shield(fut)
+        return path if path is not None else await fetch()
+
+    fut = _inflight[key] = asyncio.get_running_loop().create_future()
+    path = None
+    try:
+        path = await asyncio.to_thread(_cache_lookup, key)
+        if path is None:
+            path = await fetch()
+            if path:
+                path = await asyncio.to_thread(_cache_store, key, str(path))
+    finally:
+        del _inflight[key]
+        fut.set_result(path)
+    if path:
+        _remember_path(key, path)
+    return path
+
+
+def _sent_recently(chat: int | str, source: tuple[int, int]) -> bool:
+    """
+    True if a text for *source* — (chat id, message id) of the logged
+    message — went to *chat* less than SEND_DEDUP_TTL seconds ago.
+    """
+    return _recent_sends.get((chat, *source), 0.0) > time.monotonic()
+
+
+def _mark_sent(chat: int | str, source: tuple[int, int]) -> None:
+    """Record a successful text send for *source* to *chat*."""
+    now = time.monotonic()
+    if len(_recent_sends) >= _SEND_DEDUP_MAX:
+        for key in [k for k, exp in _recent_sends.items() if exp <= now]:
+            del _recent_sends[key]
+        if len(_recent_sends) >= _SEND_DEDUP_MAX:
+            del _recent_sends[next(iter(_recent_sends))]
+    _recent_sends[(chat, *source)] = now + SEND_DEDUP_TTL
@@ -12,78 +12,89 @@ Usage:
     # result.file_path   — local path (if downloaded)
     # result.public_link — t.me link  (if available)
     # result.method      — "file" | "link" | "both" | "none"
+
+    # Or schedule it and keep handling updates; await the task later:
+    task = download_and_attach_nowait(client, message, parsed_html, log_chat)
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import mimetypes
 import os
 import time
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Optional
-
+from html import escape as _esc
+
+from log_batcher import LogChatBatcher
+from media_common import (
+    ATTACH_MODE,
+    DOWNLOAD_DIR,
+    KEEP_FILES,
+    MAX_DOWNLOAD_SIZE,
+    MEMORY_THRESHOLD,
+    _CAPTION_LIMIT,
+    _CFG,
+    _ELLIPSIS,
+    _NOT_DL_PREFIX,
+    MediaResult,
+    _download_sem,
+    _Cfg,
+    _build_link,
+    _ensure_dir,
+    _finalize_method,
+    _fmt,
+    _mark_sent,
+    _release_data,
+    _sent_recently,
+    _single_flight,
+    _spawn,
+)
 from pyrogram import Client
 from pyrogram.types import Message
 
-logger = logging.getLogger("media_dl_pyrogram")
-
-# ═══════════════════════════════════════════════════════════════════════════
-# Configuration
-# ═══════════════════════════════════════════════════════════════════════════
-
-DOWNLOAD_DIR: str = os.getenv("DOWNLOAD_DIR", "downloads")
-
-# Max file size to auto-download (bytes).  Default 50 MB.  0 = no limit.
-MAX_DOWNLOAD_SIZE: int = int(os.getenv("MAX_DOWNLOAD_SIZE", str(50 * 1024 * 1024)))
-
-# "file" | "link" | "auto" | "both"
-ATTACH_MODE: str = os.getenv("ATTACH_MODE", "auto")
-
-KEEP_FILES: bool = os.getenv("KEEP_FILES", "true").lower() in ("1", "true", "yes")
+# The settings now live in media_common; they stay importable from here
+__all__ = [
+    "ATTACH_MODE",
+    "DOWNLOAD_DIR",
+    "KEEP_FILES",
+    "MAX_DOWNLOAD_SIZE",
+    "MEMORY_THRESHOLD",
+    "MediaResult",
+    "download_and_attach",
+    "download_and_attach_nowait",
+    "download_media",
+]
 
+logger = logging.getLogger("media_dl_pyrogram")
 
-# ═══════════════════════════════════════════════════════════════════════════
-# Result dataclass
-# ═══════════════════════════════════════════════════════════════════════════
-
-@dataclass
-class MediaResult:
-    method: str = "none"                 # "file" | "link" | "both" | "none"
-    file_path: Optional[str] = None
-    file_size: int = 0
-    file_name: str = ""
-    mime_type: str = ""
-    public_link: str = ""
-    media_type: str = ""                 # photo | video | document | …
-    error: str = ""
-    duration_ms: int = 0
+# Load the mime tables now rather than on the first guess_type() call
+mimetypes.init()
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Helpers
 # ═══════════════════════════════════════════════════════════════════════════
 
-def _ensure_dir(path: str) -> None:
-    Path(path).mkdir(parents=True, exist_ok=True)
-
-
-def _build_link(username: str, msg_id: int) -> str:
-    return f"https://t.me/{username}/{msg_id}" if username else ""
-
-
-def _fmt(b: int) -> str:
-    for unit in ("B", "KB", "MB", "GB"):
-        if b < 1024:
-            return f"{b:.1f} {unit}"
-        b /= 1024  # type: ignore[assignment]
-    return f"{b:.1f} TB"
+# (chat_id, message_id, edit_date) → _get_media_meta() result.  Bounded;
+# the oldest entry is evicted first.
+_META_CACHE_SIZE = 4096
+_meta_cache: dict[tuple, tuple[str, int, str, str]] = {}
 
 
 def _get_media_meta(msg: Message) -> tuple[str, int, str, str]:
-    """Return (media_type, file_size, file_name, mime_type)."""
-
+    """Return (media_type, file_size, file_name, mime_type), cached per message."""
+    key = (msg.chat.id, msg.id, msg.edit_date)
+    meta = _meta_cache.get(key)
+    if meta is None:
+        meta = _read_media_meta(msg)
+        if len(_meta_cache) >= _META_CACHE_SIZE:
+            del _meta_cache[next(iter(_meta_cache))]
+        _meta_cache[key] = meta
+    return meta
+
+
+def _read_media_meta(msg: Message) -> tuple[str, int, str, str]:
     if msg.photo:
         return ("photo", msg.photo.file_size or 0, "", "image/jpeg")
 
@@ -160,6 +171,15 @@ def _get_media_meta(msg: Message) -> tuple[str, int, str, str]:
     return ("", 0, "", "")
 
 
+def _media_key(msg: Message) -> str | None:
+    """Return the file_unique_id of *msg*'s downloadable media, if any."""
+    media = (
+        msg.photo or msg.video or msg.animation or msg.audio
+        or msg.voice or msg.video_note or msg.sticker or msg.document
+    )
+    return getattr(media, "file_unique_id", None)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Core: download media
 # ═══════════════════════════════════════════════════════════════════════════
@@ -170,15 +190,17 @@ async def download_media(
     *,
     dest_dir: str = "",
     size_limit: int = 0,
+    in_memory: bool = False,
 ) -> MediaResult:
     """
     Download media from a Pyrogram message.
 
-    Returns MediaResult with file_path set on success.
+    With *in_memory*, files up to MEMORY_THRESHOLD land in file_data instead
+    of on disk.  Returns MediaResult with file_path (or file_data) set on
+    success.
     """
-    dest_dir = dest_dir or DOWNLOAD_DIR
-    _ensure_dir(dest_dir)
-
+    # ── plan: metadata, link and size check — no filesystem access ──
+    cfg = _CFG
     result = MediaResult()
     media_type, approx_size, fname, mime = _get_media_meta(message)
     result.media_type = media_type
@@ -196,32 +218,86 @@ async def download_media(
     result.public_link = _build_link(chat_username, message.id)
 
     # Check size limit
-    effective_limit = size_limit or MAX_DOWNLOAD_SIZE
+    effective_limit = size_limit or cfg.max_size
     if effective_limit and approx_size > effective_limit:
         logger.info(
             "Skipping download: %s (%s) exceeds limit %s",
             fname, _fmt(approx_size), _fmt(effective_limit),
         )
-        result.method = "link" if result.public_link else "none"
-        return result
+        return _finalize_method(result)
+
+    if in_memory and approx_size <= cfg.memory_threshold:
+        async with _download_sem:
+            return await _download_to_memory(message, result)
+    return await _do_download(message, result, dest_dir or cfg.download_dir, cfg)
 
-    # Download
+
+async def _download_to_memory(message: Message, result: MediaResult) -> MediaResult:
+    """Fetch the media planned in *result* into a named BytesIO."""
     t0 = time.monotonic()
     try:
-        dest = os.path.join(dest_dir, fname) if fname else dest_dir
-        path = await message.download(file_name=dest)
+        buf = await message.download(in_memory=True)
     except Exception as exc:
         logger.error("Download failed: %s", exc)
         result.error = str(exc)
-        result.method = "link" if result.public_link else "none"
-        return result
+        return _finalize_method(result)
+
+    elapsed = int((time.monotonic() - t0) * 1000)
+    result.duration_ms = elapsed
+
+    if not buf:
+        result.error = "download returned None"
+        return _finalize_method(result)
+
+    buf.seek(0)
+    result.file_data = buf
+    result.file_size = buf.getbuffer().nbytes
+    result.file_name = buf.name or result.file_name
+    logger.info(
+        "Downloaded %s → memory (%s) in %dms",
+        result.media_type, _fmt(result.file_size), elapsed,
+    )
+
+    return _finalize_method(result)
+
+
+async def _do_download(
+    message: Message,
+    result: MediaResult,
+    dest_dir: str,
+    cfg: _Cfg,
+) -> MediaResult:
+    """Fetch the media planned in *result* into *dest_dir* and set the method."""
+    await _ensure_dir(dest_dir)
+    media_type = result.media_type
+    fname = result.file_name
+    mime = result.mime_type
+
+    t0 = time.monotonic()
+    dest = os.path.join(dest_dir, fname) if fname else dest_dir
+
+    async def fetch():
+        async with _download_sem:
+            return await message.download(file_name=dest)
+
+    # Files are deleted after sending unless KEEP_FILES, so only share them
+    # then; the cache lives under DOWNLOAD_DIR, so other targets bypass it
+    key = None
+    if cfg.keep_files and dest_dir == cfg.download_dir:
+        key = _media_key(message)
+    try:
+        path = await _single_flight(key, fetch)
+    except Exception as exc:
+        logger.error("Download failed: %s", exc)
+        result.error = str(exc)
+        return _finalize_method(result)
 
     elapsed = int((time.monotonic() - t0) * 1000)
     result.duration_ms = elapsed
 
     if path:
         result.file_path = str(path)
-        result.file_size = os.path.getsize(path)
+        result.file_size = await asyncio.to_thread(os.path.getsize, path)
         result.mime_type = mimetypes.guess_type(path)[0] or mime
         result.file_name = os.path.basename(path)
         logger.info(
@@ -230,19 +306,42 @@ async def download_media(
         )
     else:
         result.error = "download returned None"
-        result.method = "link" if result.public_link else "none"
-        return result
 
-    if result.file_path and result.public_link:
-        result.method = "both"
-    elif result.file_path:
-        result.method = "file"
-    elif result.public_link:
-        result.method = "link"
-    else:
-        result.method = "none"
+    return _finalize_method(result)
 
-    return result
+
+# (id(client), log_chat) → batcher for text-only sends
+_batchers: dict[tuple[int, int | str], LogChatBatcher] = {}
+
+
+def _get_batcher(client: Client, log_chat: int | str) -> LogChatBatcher:
+    """Return the text batcher for *log_chat*, creating it on first use."""
+    key = (id(client), log_chat)
+    batcher = _batchers.get(key)
+    if batcher is None:
+        async def send(text: str) -> None:
+            await client.send_message(log_chat, text, disable_web_page_preview=True)
+
+        batcher = _batchers[key] = LogChatBatcher(send)
+    return batcher
+
+
+async def _send_text(
+    client: Client,
+    log_chat: int | str,
+    text: str,
+    message: Message,
+) -> None:
+    """
+    Send *text* through the batcher unless a text for the same *message*
+    was just sent to *log_chat*.
+    """
+    source = (message.chat.id, message.id)
+    if _sent_recently(log_chat, source):
+        logger.debug("Skipping duplicate send to %s", log_chat)
+        return
+    await _get_batcher(client, log_chat).process(text)
+    _mark_sent(log_chat, source)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -263,102 +362,121 @@ async def download_and_attach(
 
     attach_mode: "file" | "link" | "auto" | "both"
     """
-    mode = (attach_mode or ATTACH_MODE).lower()
-    result = await download_media(client, message)
+    cfg = _CFG
+    mode = (attach_mode or cfg.attach_mode).lower()
+    result = await download_media(client, message, in_memory=not cfg.keep_files)
 
     # ── nothing to attach ──
     if result.method == "none":
-        await client.send_message(
-            log_chat, parsed_html, disable_web_page_preview=True,
-        )
+        _release_data(result)
+        await _send_text(client, log_chat, parsed_html, message)
         return result
 
     # ── build link line ──
-    from html import escape as esc
     link_line = ""
     if result.public_link:
-        link_line = f'\n\n<a href="{esc(result.public_link)}">🔗 Original</a>'
+        link_line = f'\n\n<a href="{_esc(result.public_link)}">🔗 Original</a>'
 
     # Captions are limited to 1024 chars for media messages
-    caption = parsed_html
-    if len(caption) > 900:
-        caption = caption[:900] + "…"
+    caption = (
+        parsed_html if len(parsed_html) <= _CAPTION_LIMIT
+        else parsed_html[:_CAPTION_LIMIT] + _ELLIPSIS
+    )
 
+    upload = result.file_path or result.file_data
     send_file = False
     send_link_only = False
 
     if mode == "file":
-        send_file = bool(result.file_path)
+        send_file = bool(upload)
     elif mode == "link":
         send_link_only = True
     elif mode == "both":
-        send_file = bool(result.file_path)
+        send_file = bool(upload)
         caption += link_line
     else:  # auto
-        send_file = bool(result.file_path)
-        if not result.file_path:
+        send_file = bool(upload)
+        if not upload:
             send_link_only = True
 
     try:
-        if send_file and result.file_path:
+        if send_file and upload:
             # Choose the right send method for the media type
             send_fn = _pick_send_function(client, result.media_type)
             final_caption = caption + (link_line if mode == "both" else "")
 
             await send_fn(
                 log_chat,
-                result.file_path,
+                upload,
                 caption=final_caption,
             )
             result.method = "both" if (mode == "both" and result.public_link) else "file"
 
-        elif send_link_only or not result.file_path:
+        elif send_link_only or not upload:
             text = parsed_html
             if result.public_link:
                 text += link_line
-            if result.file_size and not result.file_path:
+            if result.file_size and not upload:
                 text += (
-                    f"\n\n📎 <b>Media not downloaded</b> "
-                    f"({esc(result.media_type)}, {_fmt(result.file_size)})"
+                    f"{_NOT_DL_PREFIX}{_esc(result.media_type)}, {_fmt(result.file_size)})"
                 )
-            await client.send_message(
-                log_chat, text, disable_web_page_preview=True,
-            )
+            await _send_text(client, log_chat, text, message)
             result.method = "link" if result.public_link else "none"
         else:
-            await client.send_message(
-                log_chat, parsed_html, disable_web_page_preview=True,
-            )
+            await _send_text(client, log_chat, parsed_html, message)
 
     except Exception as exc:
         logger.error("Failed to send media to log chat: %s", exc)
         result.error = str(exc)
         try:
-            await client.send_message(
-                log_chat, parsed_html, disable_web_page_preview=True,
-            )
+            await _send_text(client, log_chat, parsed_html, message)
         except Exception:
             pass
 
     # Cleanup
-    if result.file_path and not KEEP_FILES:
+    _release_data(result)
+    if result.file_path and not cfg.keep_files:
         try:
-            os.remove(result.file_path)
+            await asyncio.to_thread(os.remove, result.file_path)
         except OSError:
             pass
 
     return result
 
 
+def download_and_attach_nowait(
+    client: Client,
+    message: Message,
+    parsed_html: str,
+    log_chat: int | str,
+    *,
+    attach_mode: str = "",
+) -> asyncio.Task:
+    """
+    Schedule download_and_attach() in the background and return its task.
+
+    Lets a handler return immediately so downloads from a burst of posts
+    overlap (bounded by DOWNLOAD_CONCURRENCY); await the task for the
+    MediaResult.
+    """
+    return _spawn(
+        download_and_attach(client, message, parsed_html, log_chat, attach_mode=attach_mode)
+    )
+
+
 def _pick_send_function(client: Client, media_type: str):
     """Return the appropriate Pyrogram send method for the media type."""
-    mapping = {
-        "photo":      client.send_photo,
-        "video":      client.send_video,
-        "gif":        client.send_animation,
-        "audio":      client.send_audio,
-        "voice":      client.send_voice,
-        "video_note": client.send_video_note,
-        "sticker":    client.send_sticker,
-    }
-    return mapping.get(media_type, client.send_document)
+    # Stored on the client, so the table lives and dies with it
+    mapping = getattr(client, "_log_send_fns", None)
+    if mapping is None:
+        mapping = client._log_send_fns = {
+            "photo":      client.send_photo,
+            "video":      client.send_video,
+            "gif":        client.send_animation,
+            "audio":      client.send_audio,
+            "voice":      client.send_voice,
+            "video_note": client.send_video_note,
+            "sticker":    client.send_sticker,
+            "document":   client.send_document,
+        }
+    return mapping.get(media_type) or mapping["document"]
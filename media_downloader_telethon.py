@@ -12,21 +12,59 @@ Usage:
     # result.file_path   — local path (if downloaded)
     # result.public_link — t.me link  (if available)
     # result.method      — "file" | "link" | "both" | "none"
+
+    # Or schedule it and keep handling updates; await the task later:
+    task = download_and_attach_nowait(client, message, parsed_html, log_chat)
+
+    # Text-only summaries, batched per log chat:
+    await send_text(client, log_chat, parsed_html)
 """
 
 from __future__ import annotations
 
+import asyncio
+import io
 import logging
 import mimetypes
 import os
 import time
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Optional
-
+from html import escape as _esc
+
+from log_batcher import LogChatBatcher
+from media_common import (
+    ATTACH_MODE,
+    DOWNLOAD_DIR,
+    KEEP_FILES,
+    MAX_DOWNLOAD_SIZE,
+    MEMORY_THRESHOLD,
+    _CAPTION_LIMIT,
+    _CFG,
+    _ELLIPSIS,
+    _NOT_DL_PREFIX,
+    MediaResult,
+    _download_sem,
+    _Cfg,
+    _build_link,
+    _ensure_dir,
+    _finalize_method,
+    _fmt,
+    _mark_sent,
+    _release_data,
+    _sent_recently,
+    _single_flight,
+    _spawn,
+)
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.upload import GetFileRequest
 from telethon.tl.types import (
     Document,
+    DocumentAttributeAnimated,
+    DocumentAttributeAudio,
+    DocumentAttributeFilename,
+    DocumentAttributeSticker,
+    DocumentAttributeVideo,
+    InputDocumentFileLocation,
     MessageMediaContact,
     MessageMediaDocument,
     MessageMediaGeo,
@@ -38,64 +76,86 @@ from telethon.tl.types import (
     Photo,
 )
 
+# The settings now live in media_common; they stay importable from here
+__all__ = [
+    "ATTACH_MODE",
+    "DOWNLOAD_DIR",
+    "KEEP_FILES",
+    "MAX_DOWNLOAD_SIZE",
+    "MEMORY_THRESHOLD",
+    "MediaResult",
+    "PARALLEL_MIN_SIZE",
+    "PARALLEL_WORKERS",
+    "download_and_attach",
+    "download_and_attach_nowait",
+    "download_media",
+    "send_text",
+]
+
 logger = logging.getLogger("media_dl_telethon")
 
+# Load the mime tables now rather than on the first guess_type() call
+mimetypes.init()
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Configuration
 # ═══════════════════════════════════════════════════════════════════════════
 
-# Directory where downloaded media is stored
-DOWNLOAD_DIR: str = os.getenv("DOWNLOAD_DIR", "downloads")
+# Documents at least this large are fetched with several concurrent
+# GetFileRequest workers instead of client.download_media.  Default 1 MB.
+PARALLEL_MIN_SIZE: int = int(os.getenv("PARALLEL_MIN_SIZE", str(1024 * 1024)))
 
-# Max file size to auto-download (bytes).  Files larger than this get a
-# link only.  Default 50 MB.  Set 0 to disable the limit.
-MAX_DOWNLOAD_SIZE: int = int(os.getenv("MAX_DOWNLOAD_SIZE", str(50 * 1024 * 1024)))
+# Number of concurrent part requests per parallel download.
+PARALLEL_WORKERS: int = int(os.getenv("PARALLEL_WORKERS", "8"))
 
-# When sending to log chat: "file" = always send file, "link" = always
-# send link, "auto" = send file if small enough, otherwise link,
-# "both" = send file + link when possible.
-ATTACH_MODE: str = os.getenv("ATTACH_MODE", "auto")   # file | link | auto | both
+# GetFileRequest part size: must divide 1 MB and be a multiple of 4 KB.
+_PART_SIZE = 512 * 1024
+_PART_RETRIES = 5
 
-# Keep files on disk after sending?  "true" / "false"
-KEEP_FILES: bool = os.getenv("KEEP_FILES", "true").lower() in ("1", "true", "yes")
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# Result dataclass
+# Helpers
 # ═══════════════════════════════════════════════════════════════════════════
 
-@dataclass
-class MediaResult:
-    """Result of a media download / attach operation."""
+# chat_id → (username, expires_at).  Saves a get_chat() round-trip per post.
+# Entries are refreshed only when they expire.
+_USERNAME_TTL: float = float(os.getenv("USERNAME_TTL", "3600"))
+_username_cache: dict[int, tuple[str, float]] = {}
 
-    method: str = "none"                 # "file" | "link" | "both" | "none"
-    file_path: Optional[str] = None      # local path to downloaded file
-    file_size: int = 0
-    file_name: str = ""
-    mime_type: str = ""
-    public_link: str = ""                # https://t.me/…  (public channels only)
-    media_type: str = ""                 # photo | video | document | audio | …
-    error: str = ""
-    duration_ms: int = 0                 # how long the download took
 
+async def _cached_username(message) -> str:
+    """Return the public username of *message*'s chat ("" if none), cached per chat."""
+    now = time.monotonic()
+    hit = _username_cache.get(message.chat_id)
+    if hit is not None and hit[1] > now:
+        return hit[0]
+    # message.chat is already populated when the event carried the entity
+    chat = message.chat or await message.get_chat()
+    username = getattr(chat, "username", "") or ""
+    _username_cache[message.chat_id] = (username, now + _USERNAME_TTL)
+    return username
 
-# ═══════════════════════════════════════════════════════════════════════════
-# Helpers
-# ═══════════════════════════════════════════════════════════════════════════
 
-def _ensure_dir(path: str) -> None:
-    Path(path).mkdir(parents=True, exist_ok=True)
-
-
-def _build_public_link(chat_username: str, message_id: int) -> str:
-    """Build a t.me link to the original message (public channels only)."""
-    if chat_username:
-        return f"https://t.me/{chat_username}/{message_id}"
-    return ""
+# (chat_id, message_id, edit_date) → _get_media_meta() result.  Bounded;
+# the oldest entry is evicted first.
+_META_CACHE_SIZE = 4096
+_meta_cache: dict[tuple, tuple[str, int, str]] = {}
 
 
 def _get_media_meta(message) -> tuple[str, int, str]:
-    """Return (media_type, approx_file_size, suggested_filename)."""
+    """Return (media_type, approx_file_size, suggested_filename), cached per message."""
+    key = (message.chat_id, message.id, message.edit_date)
+    meta = _meta_cache.get(key)
+    if meta is None:
+        meta = _read_media_meta(message)
+        if len(_meta_cache) >= _META_CACHE_SIZE:
+            del _meta_cache[next(iter(_meta_cache))]
+        _meta_cache[key] = meta
+    return meta
+
+
+def _read_media_meta(message) -> tuple[str, int, str]:
     media = message.media
     if media is None:
         return ("", 0, "")
@@ -120,42 +180,31 @@ def _get_media_meta(message) -> tuple[str, int, str]:
         mime = doc.mime_type or ""
         fname = ""
 
+        # Classify in a single pass over the attributes
+        is_animated = is_sticker = is_video = is_audio = False
+        round_msg = is_voice = False
         for attr in doc.attributes:
-            if hasattr(attr, "file_name") and attr.file_name:
-                fname = attr.file_name
-                break
-
-        # Classify
-        is_animated = any(
-            type(a).__name__ == "DocumentAttributeAnimated" for a in doc.attributes
-        )
-        is_sticker = any(
-            type(a).__name__ == "DocumentAttributeSticker" for a in doc.attributes
-        )
-        is_video = any(
-            type(a).__name__ == "DocumentAttributeVideo" for a in doc.attributes
-        )
-        is_audio = any(
-            type(a).__name__ == "DocumentAttributeAudio" for a in doc.attributes
-        )
+            if isinstance(attr, DocumentAttributeFilename):
+                if not fname:
+                    fname = attr.file_name or ""
+            elif isinstance(attr, DocumentAttributeVideo):
+                is_video = True
+                round_msg = round_msg or bool(attr.round_message)
+            elif isinstance(attr, DocumentAttributeAudio):
+                is_audio = True
+                is_voice = is_voice or bool(attr.voice)
+            elif isinstance(attr, DocumentAttributeAnimated):
+                is_animated = True
+            elif isinstance(attr, DocumentAttributeSticker):
+                is_sticker = True
 
         if is_sticker:
             mtype = "sticker"
         elif is_animated:
             mtype = "gif"
         elif is_video:
-            round_msg = any(
-                getattr(a, "round_message", False)
-                for a in doc.attributes
-                if type(a).__name__ == "DocumentAttributeVideo"
-            )
             mtype = "video_note" if round_msg else "video"
         elif is_audio:
-            is_voice = any(
-                getattr(a, "voice", False)
-                for a in doc.attributes
-                if type(a).__name__ == "DocumentAttributeAudio"
-            )
             mtype = "voice" if is_voice else "audio"
         else:
             mtype = "document"
@@ -180,6 +229,138 @@ def _get_media_meta(message) -> tuple[str, int, str]:
     return ("other", 0, "")
 
 
+def _media_key(message) -> str | None:
+    """Stable cache key for the photo / document of *message*: ``"<id>_<access_hash>"``."""
+    media = message.media
+    if isinstance(media, MessageMediaDocument):
+        obj = media.document
+    elif isinstance(media, MessageMediaPhoto):
+        obj = media.photo
+    else:
+        return None
+    return f"{obj.id}_{obj.access_hash}" if obj is not None else None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Parallel chunked download
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _preallocate(fd: int, size: int) -> None:
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        os.ftruncate(fd, size)
+
+
+async def _get_file_part(client: TelegramClient, sender, location, offset: int, limit: int) -> bytes:
+    """Fetch one part, backing off on FloodWait and transient network errors."""
+    request = GetFileRequest(location, offset, limit)
+    for attempt in range(_PART_RETRIES):
+        try:
+            if sender is None:
+                result = await client(request)
+            else:
+                result = await client._call(sender, request)
+            return result.bytes
+        except FloodWaitError as exc:
+            logger.warning("FloodWait %ss on part @%d", exc.seconds, offset)
+            await asyncio.sleep(exc.seconds + 1)
+        except (ConnectionError, asyncio.TimeoutError):
+            if attempt == _PART_RETRIES - 1:
+                raise
+            await asyncio.sleep(2 ** attempt)
+    raise RuntimeError(f"part @{offset} failed after {_PART_RETRIES} attempts")
+
+
+def _use_parallel(media, file_name: str, size: int) -> bool:
+    """True if _parallel_download can fetch this media (a named document)."""
+    return (
+        isinstance(media, MessageMediaDocument)
+        and media.document is not None
+        and bool(file_name)
+        and size >= PARALLEL_MIN_SIZE
+        and hasattr(os, "pwrite")
+    )
+
+
+async def _parallel_download(
+    client: TelegramClient,
+    document: Document,
+    path: str,
+    workers: int = PARALLEL_WORKERS,
+    chunk: int = _PART_SIZE,
+) -> str:
+    """
+    Download *document* into *path* with *workers* concurrent part requests.
+
+    Parts are written in place with ``os.pwrite`` into a preallocated file.
+    Documents stored on another DC are fetched through an exported sender.
+    """
+    size = document.size
+    location = InputDocumentFileLocation(
+        id=document.id,
+        access_hash=document.access_hash,
+        file_reference=document.file_reference,
+        thumb_size="",
+    )
+
+    offsets: asyncio.Queue[int] = asyncio.Queue()
+    for offset in range(0, size, chunk):
+        offsets.put_nowait(offset)
+
+    # pwrite calls still running in the thread pool; fd must outlive them
+    writes: set[asyncio.Future] = set()
+
+    async def worker() -> None:
+        while True:
+            try:
+                offset = offsets.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            data = await _get_file_part(client, sender, location, offset, chunk)
+            write = asyncio.ensure_future(asyncio.to_thread(os.pwrite, fd, data, offset))
+            writes.add(write)
+            write.add_done_callback(writes.discard)
+            # A cancelled worker must not abandon a write that is in progress
+            await asyncio.shield(write)
+
+    sender = None
+    if document.dc_id != client.session.dc_id:
+        sender = await client._borrow_exported_sender(document.dc_id)
+
+    fd = -1
+    tasks: list[asyncio.Task] = []
+    try:
+        fd = await asyncio.to_thread(os.open, path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        await asyncio.to_thread(_preallocate, fd, size)
+        tasks = [
+            asyncio.create_task(worker())
+            for _ in range(min(workers, offsets.qsize()))
+        ]
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Stop the other workers before the sender is returned and the
+        # caller falls back to client.download_media on the same path
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, *writes, return_exceptions=True)
+        if fd != -1:
+            os.close(fd)
+            fd = -1
+            try:
+                await asyncio.to_thread(os.remove, path)
+            except OSError:
+                pass
+        raise
+    finally:
+        if fd != -1:
+            os.close(fd)
+        if sender is not None:
+            await client._return_exported_sender(sender)
+
+    return path
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Core: download media from a message
 # ═══════════════════════════════════════════════════════════════════════════
@@ -190,6 +371,7 @@ async def download_media(
     *,
     dest_dir: str = "",
     size_limit: int = 0,
+    in_memory: bool = False,
 ) -> MediaResult:
     """
     Download media from a Telethon message.
@@ -200,14 +382,16 @@ async def download_media(
     message : telethon Message object
     dest_dir : target directory (default DOWNLOAD_DIR)
     size_limit : skip download if file exceeds this (0 = no limit)
+    in_memory : download files up to MEMORY_THRESHOLD into file_data
+                instead of writing them to disk (documents from
+                PARALLEL_MIN_SIZE up still go to disk, in parallel parts)
 
     Returns
     -------
-    MediaResult with file_path set on success.
+    MediaResult with file_path (or file_data) set on success.
     """
-    dest_dir = dest_dir or DOWNLOAD_DIR
-    _ensure_dir(dest_dir)
-
+    # ── plan: metadata, link and size check — no filesystem access ──
+    cfg = _CFG
     result = MediaResult()
     media_type, approx_size, suggested_name = _get_media_meta(message)
     result.media_type = media_type
@@ -220,39 +404,110 @@ async def download_media(
     result.file_name = suggested_name
 
     # Build public link
-    chat = await message.get_chat()
-    chat_username = getattr(chat, "username", "") or ""
-    result.public_link = _build_public_link(chat_username, message.id)
+    chat_username = await _cached_username(message)
+    result.public_link = _build_link(chat_username, message.id)
 
     # Check size limit
-    effective_limit = size_limit or MAX_DOWNLOAD_SIZE
+    effective_limit = size_limit or cfg.max_size
     if effective_limit and approx_size > effective_limit:
         logger.info(
             "Skipping download: %s (%s) exceeds limit %s",
             suggested_name, _fmt(approx_size), _fmt(effective_limit),
         )
-        result.method = "link" if result.public_link else "none"
-        return result
+        return _finalize_method(result)
+
+    # The in-memory download is single-stream, so files the disk path would
+    # fetch in parallel parts go to disk even with in_memory
+    if (
+        in_memory
+        and approx_size <= cfg.memory_threshold
+        and not _use_parallel(message.media, suggested_name, approx_size)
+    ):
+        async with _download_sem:
+            return await _download_to_memory(client, message, result)
+    return await _do_download(client, message, result, dest_dir or cfg.download_dir, cfg)
+
+
+async def _download_to_memory(
+    client: TelegramClient,
+    message,
+    result: MediaResult,
+) -> MediaResult:
+    """Fetch the media planned in *result* into a named BytesIO."""
+    t0 = time.monotonic()
+    try:
+        data = await client.download_media(message, file=bytes)
+    except Exception as exc:
+        logger.error("Download failed: %s", exc)
+        result.error = str(exc)
+        return _finalize_method(result)
+
+    elapsed = int((time.monotonic() - t0) * 1000)
+    result.duration_ms = elapsed
+
+    if not data:
+        result.error = "download_media returned None"
+        return _finalize_method(result)
+
+    buf = io.BytesIO(data)
+    buf.name = result.file_name or f"photo_{message.id}.jpg"   # send_file reads .name
+    result.file_data = buf
+    result.file_size = len(data)
+    result.file_name = buf.name
+    result.mime_type = mimetypes.guess_type(buf.name)[0] or ""
+    logger.info(
+        "Downloaded %s → memory (%s) in %dms",
+        result.media_type, _fmt(result.file_size), elapsed,
+    )
+
+    return _finalize_method(result)
+
+
+async def _do_download(
+    client: TelegramClient,
+    message,
+    result: MediaResult,
+    dest_dir: str,
+    cfg: _Cfg,
+) -> MediaResult:
+    """Fetch the media planned in *result* into *dest_dir* and set the method."""
+    await _ensure_dir(dest_dir)
+    media_type = result.media_type
+    approx_size = result.file_size
+    suggested_name = result.file_name
 
     # Download
     t0 = time.monotonic()
+    target = os.path.join(dest_dir, suggested_name) if suggested_name else dest_dir
+    media = message.media
+
+    async def fetch():
+        async with _download_sem:
+            if _use_parallel(media, suggested_name, approx_size):
+                try:
+                    return await _parallel_download(client, media.document, target)
+                except Exception as exc:
+                    logger.warning("Parallel download failed, falling back: %s", exc)
+            return await client.download_media(message, file=target)
+
+    # Files are deleted after sending unless KEEP_FILES, so only share them
+    # then; the cache lives under DOWNLOAD_DIR, so other targets bypass it
+    key = None
+    if cfg.keep_files and dest_dir == cfg.download_dir:
+        key = _media_key(message)
     try:
-        path = await client.download_media(
-            message,
-            file=os.path.join(dest_dir, suggested_name) if suggested_name else dest_dir,
-        )
+        path = await _single_flight(key, fetch)
     except Exception as exc:
         logger.error("Download failed: %s", exc)
         result.error = str(exc)
-        result.method = "link" if result.public_link else "none"
-        return result
+        return _finalize_method(result)
 
     elapsed = int((time.monotonic() - t0) * 1000)
     result.duration_ms = elapsed
 
     if path:
         result.file_path = str(path)
-        result.file_size = os.path.getsize(path)
+        result.file_size = await asyncio.to_thread(os.path.getsize, path)
         result.mime_type = mimetypes.guess_type(path)[0] or ""
         result.file_name = os.path.basename(path)
         logger.info(
@@ -261,20 +516,47 @@ async def download_media(
         )
     else:
         result.error = "download_media returned None"
-        result.method = "link" if result.public_link else "none"
-        return result
 
-    # Decide method
-    if result.file_path and result.public_link:
-        result.method = "both"
-    elif result.file_path:
-        result.method = "file"
-    elif result.public_link:
-        result.method = "link"
-    else:
-        result.method = "none"
+    return _finalize_method(result)
+
+
+# (id(client), log_chat) → batcher for text-only sends
+_batchers: dict[tuple[int, int | str], LogChatBatcher] = {}
 
-    return result
+
+def _get_batcher(client: TelegramClient, log_chat: int | str) -> LogChatBatcher:
+    """Return the text batcher for *log_chat*, creating it on first use."""
+    key = (id(client), log_chat)
+    batcher = _batchers.get(key)
+    if batcher is None:
+        async def send(text: str) -> None:
+            await client.send_message(log_chat, text, parse_mode="html", link_preview=False)
+
+        batcher = _batchers[key] = LogChatBatcher(send)
+    return batcher
+
+
+async def send_text(client: TelegramClient, log_chat: int | str, text: str) -> None:
+    """Queue *text* for *log_chat*; bursts go out batched into one message."""
+    await _get_batcher(client, log_chat).process(text)
+
+
+async def _send_text(
+    client: TelegramClient,
+    log_chat: int | str,
+    text: str,
+    message,
+) -> None:
+    """
+    Send *text* through the batcher unless a text for the same *message*
+    was just sent to *log_chat*.
+    """
+    source = (message.chat_id, message.id)
+    if _sent_recently(log_chat, source):
+        logger.debug("Skipping duplicate send to %s", log_chat)
+        return
+    await send_text(client, log_chat, text)
+    _mark_sent(log_chat, source)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -302,97 +584,92 @@ async def download_and_attach(
 
     Returns the MediaResult for inspection / logging.
     """
-    mode = (attach_mode or ATTACH_MODE).lower()
-    result = await download_media(client, message)
+    cfg = _CFG
+    mode = (attach_mode or cfg.attach_mode).lower()
+    result = await download_media(client, message, in_memory=not cfg.keep_files)
     if message.grouped_id:
         logger.debug("Message is part of a media group (album), skipping download to avoid duplicates.")
         result.method = "none"
+        _release_data(result)
         return result
 
     # ── nothing to attach ──
     if result.method == "none":
-        await client.send_message(
-            log_chat, parsed_html, parse_mode="html", link_preview=False,
-        )
+        _release_data(result)
+        await _send_text(client, log_chat, parsed_html, message)
         return result
 
     # ── build caption (trimmed to 1024 for media messages) ──
     link_line = ""
     if result.public_link:
-        from html import escape
-        link_line = f'\n\n<a href="{escape(result.public_link)}">🔗 Original</a>'
+        link_line = f'\n\n<a href="{_esc(result.public_link)}">🔗 Original</a>'
 
-    caption = parsed_html
-    if len(caption) > 900:
-        caption = caption[:900] + "…"
+    caption = (
+        parsed_html if len(parsed_html) <= _CAPTION_LIMIT
+        else parsed_html[:_CAPTION_LIMIT] + _ELLIPSIS
+    )
 
     # ── decide what to send ──
+    upload = result.file_path or result.file_data
     send_file = False
     send_link_only = False
 
     if mode == "file":
-        send_file = bool(result.file_path)
+        send_file = bool(upload)
     elif mode == "link":
         send_link_only = True
     elif mode == "both":
-        send_file = bool(result.file_path)
+        send_file = bool(upload)
         if result.public_link:
             caption += link_line
     else:  # auto
-        if result.file_path:
+        if upload:
             send_file = True
         else:
             send_link_only = True
 
     # ── send ──
     try:
-        if send_file and result.file_path:
+        if send_file and upload:
             # Telethon auto-detects photo vs document based on mime
             force_document = result.media_type in (
                 "document", "audio", "voice", "sticker",
             )
             await client.send_file(
                 log_chat,
-                result.file_path,
+                upload,
                 caption=caption + (link_line if mode == "both" else ""),
                 parse_mode="html",
                 force_document=force_document,
             )
             result.method = "both" if (mode == "both" and result.public_link) else "file"
-        elif send_link_only or not result.file_path:
+        elif send_link_only or not upload:
             text = parsed_html
             if result.public_link:
                 text += link_line
             # Append file info if we have metadata but didn't download
-            if result.file_size and not result.file_path:
-                from html import escape
+            if result.file_size and not upload:
                 text += (
-                    f"\n\n📎 <b>Media not downloaded</b> "
-                    f"({escape(result.media_type)}, {_fmt(result.file_size)})"
+                    f"{_NOT_DL_PREFIX}{_esc(result.media_type)}, {_fmt(result.file_size)})"
                 )
-            await client.send_message(
-                log_chat, text, parse_mode="html", link_preview=False,
-            )
+            await _send_text(client, log_chat, text, message)
             result.method = "link" if result.public_link else "none"
         else:
-            await client.send_message(
-                log_chat, parsed_html, parse_mode="html", link_preview=False,
-            )
+            await _send_text(client, log_chat, parsed_html, message)
     except Exception as exc:
         logger.error("Failed to send media to log chat: %s", exc)
         result.error = str(exc)
         # Fallback: send text only
         try:
-            await client.send_message(
-                log_chat, parsed_html, parse_mode="html", link_preview=False,
-            )
+            await _send_text(client, log_chat, parsed_html, message)
         except Exception:
             pass
 
     # ── cleanup ──
-    if result.file_path and not KEEP_FILES:
+    _release_data(result)
+    if result.file_path and not cfg.keep_files:
         try:
-            os.remove(result.file_path)
+            await asyncio.to_thread(os.remove, result.file_path)
             logger.debug("Removed %s", result.file_path)
         except OSError:
             pass
@@ -400,9 +677,21 @@ async def download_and_attach(
     return result
 
 
-def _fmt(b: int) -> str:
-    for unit in ("B", "KB", "MB", "GB"):
-        if b < 1024:
-            return f"{b:.1f} {unit}"
-        b /= 1024  # type: ignore[assignment]
-    return f"{b:.1f} TB"
+def download_and_attach_nowait(
+    client: TelegramClient,
+    message,
+    parsed_html: str,
+    log_chat: int | str,
+    *,
+    attach_mode: str = "",
+) -> asyncio.Task:
+    """
+    Schedule download_and_attach() in the background and return its task.
+
+    Lets a handler return immediately so downloads from a burst of posts
+    overlap (bounded by DOWNLOAD_CONCURRENCY); await the task for the
+    MediaResult.
+    """
+    return _spawn(
+        download_and_attach(client, message, parsed_html, log_chat, attach_mode=attach_mode)
+    )
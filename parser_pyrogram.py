@@ -14,6 +14,10 @@ Extracted data
 
 Requirements:
     pip install pyrogram tgcrypto python-dotenv
+    (faster-pyrogram can be installed instead of pyrogram — same import name)
+    tgcrypto is needed for throughput: without it Pyrogram decrypts every
+    MTProto packet in pure Python (Pyrogram logs a warning at startup).
+    uvloop (optional, not on Windows) replaces the asyncio event loop.
 
 First-run auth:
     The script will ask for your phone number and the code Telegram sends.
@@ -29,15 +33,18 @@ from __future__ import annotations
 
 import asyncio
 import html
-import json
 import logging
 import os
 import re
-from dataclasses import asdict, dataclass, field
-from typing import Optional
+import sys
+from dataclasses import dataclass, fields
+from itertools import chain
+from typing import Callable, Optional, Sequence
 
-from pyrogram import Client, filters
+from json_log import JsonLogWriter
+from pyrogram import Client, filters, idle
 from pyrogram.enums import ChatType, MessageEntityType, MessageMediaType
+from pyrogram.handlers import MessageHandler
 from pyrogram.types import Message
 
 try:
@@ -73,11 +80,28 @@ if _raw.strip():
 
 JSON_LOG_PATH: str = os.getenv("JSON_LOG_PATH", "")
 
+# LOG_CHAT resolved once: numeric ids as int, usernames as-is
+_LOG_CHAT_TARGET: int | str | None = None
+if LOG_CHAT:
+    try:
+        _LOG_CHAT_TARGET = int(LOG_CHAT)
+    except ValueError:
+        _LOG_CHAT_TARGET = LOG_CHAT
+
+# Without LOG_CHAT summaries go to stdout; skip rendering when nobody reads it
+_STDOUT_IS_TTY: bool = sys.stdout.isatty()
+
+# Unknown names fall back to INFO instead of failing basicConfig at import
+_LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+_log_level_ok = isinstance(logging.getLevelName(_LOG_LEVEL), int)
+
 logging.basicConfig(
-    level=logging.INFO,
+    level=_LOG_LEVEL if _log_level_ok else logging.INFO,
     format="%(asctime)s | %(levelname)-8s | %(name)s — %(message)s",
 )
 logger = logging.getLogger("pyrogram_parser")
+if not _log_level_ok:
+    logger.warning("Unknown LOG_LEVEL %r, using INFO", _LOG_LEVEL)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -93,7 +117,7 @@ RE_MENTION = re.compile(r"@[A-Za-z0-9_]{3,}")
 # ═══════════════════════════════════════════════════════════════════════════
 # Data model
 # ═══════════════════════════════════════════════════════════════════════════
-@dataclass
+@dataclass(slots=True)
 class ParsedPost:
     chat_type: str = ""
     chat_title: str = ""
@@ -109,17 +133,17 @@ class ParsedPost:
     raw_text: str = ""
     text_length: int = 0
 
-    urls: list[str]                = field(default_factory=list)
-    hashtags: list[str]            = field(default_factory=list)
-    mentions: list[str]            = field(default_factory=list)
-    emails: list[str]              = field(default_factory=list)
-    phones: list[str]              = field(default_factory=list)
-    bold_texts: list[str]          = field(default_factory=list)
-    italic_texts: list[str]        = field(default_factory=list)
-    underline_texts: list[str]     = field(default_factory=list)
-    strikethrough_texts: list[str] = field(default_factory=list)
-    code_fragments: list[str]      = field(default_factory=list)
-    spoiler_texts: list[str]       = field(default_factory=list)
+    urls: Sequence[str]            = ()
+    hashtags: Sequence[str]        = ()
+    mentions: Sequence[str]        = ()
+    emails: Sequence[str]          = ()
+    phones: Sequence[str]          = ()
+    bold_texts: Sequence[str]      = ()
+    italic_texts: Sequence[str]    = ()
+    underline_texts: Sequence[str] = ()
+    strikethrough_texts: Sequence[str] = ()
+    code_fragments: Sequence[str]  = ()
+    spoiler_texts: Sequence[str]   = ()
 
     media_type: str = ""
     media_file_name: str = ""
@@ -136,24 +160,29 @@ class ParsedPost:
     views: Optional[int] = None
     forwards_count: Optional[int] = None
 
+    def to_dict(self) -> dict:
+        """Shallow field → value mapping; lists are shared, not copied."""
+        return {name: getattr(self, name) for name in _FIELDS}
+
     def to_html(self) -> str:
+        esc = _esc
         sec: list[str] = []
-        sec.append(f"<b>📨  Parsed  [{_esc(self.chat_type)}]</b>\n")
+        sec.append(f"<b>📨  Parsed  [{esc(self.chat_type)}]</b>\n")
 
         title = self.chat_title or "DM"
         if self.chat_username:
-            title += f"  (@{_esc(self.chat_username)})"
-        sec.append(f"<b>📡 Chat:</b>  {_esc(title)}")
+            title += f"  (@{esc(self.chat_username)})"
+        sec.append(f"<b>📡 Chat:</b>  {esc(title)}")
         sec.append(f"<b>🆔 ID:</b>  <code>{self.chat_id}</code> / msg <code>{self.message_id}</code>")
         if self.date:
-            sec.append(f"<b>🕐 Date:</b>  {_esc(self.date)}")
+            sec.append(f"<b>🕐 Date:</b>  {esc(self.date)}")
         if self.sender_name:
             sn = self.sender_name
             if self.sender_username:
-                sn += f"  (@{_esc(self.sender_username)})"
-            sec.append(f"<b>👤 From:</b>  {_esc(sn)}")
+                sn += f"  (@{esc(self.sender_username)})"
+            sec.append(f"<b>👤 From:</b>  {esc(sn)}")
         if self.forwarded_from:
-            sec.append(f"<b>↩️ Fwd:</b>  {_esc(self.forwarded_from)}")
+            sec.append(f"<b>↩️ Fwd:</b>  {esc(self.forwarded_from)}")
         if self.reply_to_message_id:
             sec.append(f"<b>💬 Reply:</b>  #{self.reply_to_message_id}")
 
@@ -170,30 +199,42 @@ class ParsedPost:
         sec.append("<b>📝 Text:</b>")
         if self.raw_text:
             preview = self.raw_text[:500] + ("…" if len(self.raw_text) > 500 else "")
-            sec.append(f"<pre>{_esc(preview)}</pre>")
+            sec.append(f"<pre>{esc(preview)}</pre>")
             sec.append(f"<i>({self.text_length} chars)</i>")
         else:
             sec.append("<i>— no text —</i>")
 
-        sec += _render_list("🔗 URLs",       self.urls,               limit=12)
-        sec += _render_tags("#️⃣ Hashtags",   self.hashtags)
-        sec += _render_tags("👤 Mentions",    self.mentions)
-        sec += _render_list("✉️ Emails",     self.emails)
-        sec += _render_list("📞 Phones",     self.phones)
-        sec += _render_list("🅱️ Bold",       self.bold_texts,          limit=8, trim=100)
-        sec += _render_list("🔤 Italic",     self.italic_texts,        limit=8, trim=100)
-        sec += _render_list("⎁ Underline",   self.underline_texts,     limit=6, trim=100)
-        sec += _render_list("🪧 Strike",     self.strikethrough_texts,  limit=6, trim=100)
-        sec += _render_code("💻 Code",       self.code_fragments,       limit=5)
-        sec += _render_list("🫣 Spoiler",    self.spoiler_texts,        limit=5, trim=80)
+        # Most posts have no formatting; skip the helper calls for empty buckets
+        if self.urls:
+            sec += _render_list("🔗 URLs",       self.urls,               limit=12)
+        if self.hashtags:
+            sec += _render_tags("#️⃣ Hashtags",   self.hashtags)
+        if self.mentions:
+            sec += _render_tags("👤 Mentions",    self.mentions)
+        if self.emails:
+            sec += _render_list("✉️ Emails",     self.emails)
+        if self.phones:
+            sec += _render_list("📞 Phones",     self.phones)
+        if self.bold_texts:
+            sec += _render_list("🅱️ Bold",       self.bold_texts,          limit=8, trim=100)
+        if self.italic_texts:
+            sec += _render_list("🔤 Italic",     self.italic_texts,        limit=8, trim=100)
+        if self.underline_texts:
+            sec += _render_list("⎁ Underline",   self.underline_texts,     limit=6, trim=100)
+        if self.strikethrough_texts:
+            sec += _render_list("🪧 Strike",     self.strikethrough_texts,  limit=6, trim=100)
+        if self.code_fragments:
+            sec += _render_code("💻 Code",       self.code_fragments,       limit=5)
+        if self.spoiler_texts:
+            sec += _render_list("🫣 Spoiler",    self.spoiler_texts,        limit=5, trim=80)
 
         if self.media_type:
             sec.append("")
-            parts = [f"<b>📦 Media:</b>  {_esc(self.media_type)}"]
+            parts = [f"<b>📦 Media:</b>  {esc(self.media_type)}"]
             if self.media_file_name:
-                parts.append(f"  name: {_esc(self.media_file_name)}")
+                parts.append(f"  name: {esc(self.media_file_name)}")
             if self.media_mime:
-                parts.append(f"  mime: {_esc(self.media_mime)}")
+                parts.append(f"  mime: {esc(self.media_mime)}")
             if self.media_file_size:
                 parts.append(f"  size: {_fmt_size(self.media_file_size)}")
             if self.media_duration:
@@ -201,10 +242,10 @@ class ParsedPost:
             sec.append("\n".join(parts))
 
         if self.media_group_id:
-            sec.append(f"<b>🗂 Album:</b>  <code>{_esc(self.media_group_id)}</code>")
+            sec.append(f"<b>🗂 Album:</b>  <code>{esc(self.media_group_id)}</code>")
 
         if self.reactions_summary:
-            sec.append(f"<b>❤️ Reactions:</b>  {_esc(self.reactions_summary)}")
+            sec.append(f"<b>❤️ Reactions:</b>  {esc(self.reactions_summary)}")
 
         if self.chat_username:
             link = f"https://t.me/{self.chat_username}/{self.message_id}"
@@ -214,16 +255,29 @@ class ParsedPost:
         return "\n".join(sec)
 
 
+# Field names in declaration order, for ParsedPost.to_dict()
+_FIELDS: tuple[str, ...] = tuple(f.name for f in fields(ParsedPost))
+
+_HTML_SPECIAL = frozenset("&<>\"'")
+
+
 def _esc(t: str) -> str:
-    return html.escape(str(t))
+    s = t if type(t) is str else str(t)
+    # Most titles and names contain nothing to escape
+    if _HTML_SPECIAL.isdisjoint(s):
+        return s
+    return html.escape(s)
+
+
+_UNITS = ("B", "KB", "MB", "GB", "TB")
 
 
 def _fmt_size(b: int) -> str:
-    for unit in ("B", "KB", "MB", "GB"):
-        if b < 1024:
-            return f"{b:.1f} {unit}"
-        b /= 1024  # type: ignore[assignment]
-    return f"{b:.1f} TB"
+    if b < 1024:
+        return f"{b} B"
+    # Each unit step is 1024 = 2**10, so the unit index is bit_length // 10
+    i = min((b.bit_length() - 1) // 10, len(_UNITS) - 1)
+    return f"{b / (1 << (i * 10)):.1f} {_UNITS[i]}"
 
 
 def _render_list(label, items, *, limit=10, trim=0):
@@ -286,129 +340,168 @@ def _extract_entities_pyrogram(text: str, entities: list | None) -> dict[str, li
     if not entities or not text:
         return buckets
 
+    get = _PYR_MAP.get
     for ent in entities:
-        bucket = _PYR_MAP.get(ent.type)
+        bucket = get(ent.type)
         if bucket is None:
             continue
 
         # Pyrogram uses normal Python str offsets (UTF-8-aware)
-        fragment = text[ent.offset : ent.offset + ent.length]
-
-        if ent.type == MessageEntityType.TEXT_LINK:
-            buckets["urls"].append(ent.url or fragment)
-        elif ent.type == MessageEntityType.TEXT_MENTION and ent.user:
-            name = f"{ent.user.first_name or ''} {ent.user.last_name or ''}".strip()
-            buckets["mentions"].append(name or f"id:{ent.user.id}")
+        t = ent.type
+        if t is MessageEntityType.TEXT_LINK:
+            o = ent.offset
+            buckets["urls"].append(ent.url or text[o : o + ent.length])
+        elif t is MessageEntityType.TEXT_MENTION and ent.user:
+            u = ent.user
+            name = f"{u.first_name or ''} {u.last_name or ''}".strip()
+            buckets["mentions"].append(name or f"id:{u.id}")
         else:
-            buckets[bucket].append(fragment)
+            o = ent.offset
+            buckets[bucket].append(text[o : o + ent.length])
 
     return buckets
 
 
-def _extract_regex(text: str) -> dict[str, list[str]]:
+_DIGITS = frozenset("0123456789")
+
+
+def _extract_regex(text: str, found: dict[str, list[str]] | None = None) -> dict[str, list[str]]:
+    """
+    Regex fallback for texts without server-side entities.  Buckets that
+    already have items in *found* are left empty instead of re-scanned.
+    """
+    # One C-level pass collects the characters present (Telegram caps text
+    # at 4096); patterns whose trigger characters are missing are skipped.
+    # Separate patterns on purpose: a combined alternation was slower and
+    # would drop overlapping kinds (the @mention inside an email address).
+    chars = set(text)
+    has_at = "@" in chars
+    f = found or {}
     return {
-        "urls":     RE_URL.findall(text),
-        "hashtags": RE_HASHTAG.findall(text),
-        "mentions": RE_MENTION.findall(text),
-        "emails":   RE_EMAIL.findall(text),
-        "phones":   RE_PHONE.findall(text),
+        # RE_URL is case-insensitive; "://" has no case to miss
+        "urls":     RE_URL.findall(text) if not f.get("urls") and "://" in text else [],
+        "hashtags": RE_HASHTAG.findall(text) if not f.get("hashtags") and "#" in chars else [],
+        "mentions": RE_MENTION.findall(text) if not f.get("mentions") and has_at else [],
+        "emails":   RE_EMAIL.findall(text) if not f.get("emails") and has_at else [],
+        "phones":   RE_PHONE.findall(text)
+                    if not f.get("phones") and not _DIGITS.isdisjoint(chars) else [],
     }
 
 
-def _merge(a: list[str], b: list[str]) -> list[str]:
-    seen: set[str] = set()
-    out: list[str] = []
-    for item in a + b:
-        key = item.strip().lower()
-        if key and key not in seen:
-            seen.add(key)
-            out.append(item.strip())
-    return out
+def _merge(a: list[str], b: list[str], *, casefold: bool = True) -> list[str]:
+    """Stripped items of *a* then *b*, first spelling kept per (casefolded) key."""
+    if not a and not b:
+        return []
+    src = a if not b else b if not a else chain(a, b)
+    out: dict[str, str] = {}
+    for item in src:
+        k = item.strip()
+        if k:
+            out.setdefault(k.lower() if casefold else k, k)
+    return list(out.values())
+
+
+# One reader per MessageMediaType → (type, file_name, size, duration, mime)
+def _media_photo(m: Message):
+    return ("photo", "", m.photo.file_size or 0, 0, "")
+
+
+def _media_video(m: Message):
+    v = m.video
+    return ("video", v.file_name or "", v.file_size or 0, v.duration or 0, v.mime_type or "")
+
+
+def _media_animation(m: Message):
+    a = m.animation
+    return ("gif", "", a.file_size or 0, a.duration or 0, a.mime_type or "")
+
+
+def _media_audio(m: Message):
+    a = m.audio
+    return ("audio", a.file_name or "", a.file_size or 0, a.duration or 0, a.mime_type or "")
+
+
+def _media_voice(m: Message):
+    v = m.voice
+    return ("voice", "", v.file_size or 0, v.duration or 0, v.mime_type or "")
+
+
+def _media_video_note(m: Message):
+    v = m.video_note
+    return ("video_note", "", v.file_size or 0, v.duration or 0, "")
+
+
+def _media_sticker(m: Message):
+    return ("sticker", "", m.sticker.file_size or 0, 0, "")
+
+
+def _media_document(m: Message):
+    d = m.document
+    return ("document", d.file_name or "", d.file_size or 0, 0, d.mime_type or "")
+
+
+_NO_MEDIA = ("", "", 0, 0, "")
+
+_MEDIA_HANDLERS: dict[MessageMediaType, Callable[[Message], tuple[str, str, int, int, str]]] = {
+    MessageMediaType.PHOTO:      _media_photo,
+    MessageMediaType.VIDEO:      _media_video,
+    MessageMediaType.ANIMATION:  _media_animation,
+    MessageMediaType.AUDIO:      _media_audio,
+    MessageMediaType.VOICE:      _media_voice,
+    MessageMediaType.VIDEO_NOTE: _media_video_note,
+    MessageMediaType.STICKER:    _media_sticker,
+    MessageMediaType.DOCUMENT:   _media_document,
+    MessageMediaType.CONTACT:    lambda m: ("contact", "", 0, 0, ""),
+    MessageMediaType.LOCATION:   lambda m: ("location", "", 0, 0, ""),
+    MessageMediaType.POLL:       lambda m: ("poll", "", 0, 0, ""),
+    MessageMediaType.VENUE:      lambda m: ("venue", "", 0, 0, ""),
+    MessageMediaType.WEB_PAGE:   lambda m: ("webpage", "", 0, 0, ""),
+}
 
 
 def _detect_media_pyrogram(msg: Message) -> tuple[str, str, int, int, str]:
-    if not msg.media:
-        return ("", "", 0, 0, "")
-
-    mtype = ""
-    fname = ""
-    fsize = 0
-    dur = 0
-    mime = ""
-
-    if msg.photo:
-        mtype = "photo"
-        fsize = msg.photo.file_size or 0
-    elif msg.video:
-        mtype = "video"
-        fname = msg.video.file_name or ""
-        fsize = msg.video.file_size or 0
-        dur   = msg.video.duration or 0
-        mime  = msg.video.mime_type or ""
-    elif msg.animation:
-        mtype = "gif"
-        fsize = msg.animation.file_size or 0
-        dur   = msg.animation.duration or 0
-        mime  = msg.animation.mime_type or ""
-    elif msg.audio:
-        mtype = "audio"
-        fname = msg.audio.file_name or ""
-        fsize = msg.audio.file_size or 0
-        dur   = msg.audio.duration or 0
-        mime  = msg.audio.mime_type or ""
-    elif msg.voice:
-        mtype = "voice"
-        fsize = msg.voice.file_size or 0
-        dur   = msg.voice.duration or 0
-        mime  = msg.voice.mime_type or ""
-    elif msg.video_note:
-        mtype = "video_note"
-        fsize = msg.video_note.file_size or 0
-        dur   = msg.video_note.duration or 0
-    elif msg.sticker:
-        mtype = "sticker"
-        fsize = msg.sticker.file_size or 0
-    elif msg.document:
-        mtype = "document"
-        fname = msg.document.file_name or ""
-        fsize = msg.document.file_size or 0
-        mime  = msg.document.mime_type or ""
-    elif msg.contact:
-        mtype = "contact"
-    elif msg.location:
-        mtype = "location"
-    elif msg.poll:
-        mtype = "poll"
-    elif msg.venue:
-        mtype = "venue"
-    elif msg.web_page:
-        mtype = "webpage"
-
-    return (mtype, fname, fsize, dur, mime)
+    media = msg.media
+    if not media:
+        return _NO_MEDIA
+    handler = _MEDIA_HANDLERS.get(media)
+    return handler(msg) if handler is not None else _NO_MEDIA
 
 
 def _get_reactions_pyrogram(msg: Message) -> str:
-    reactions = getattr(msg, "reactions", None)
+    reactions = msg.reactions
     if not reactions:
         return ""
-    reaction_list = getattr(reactions, "reactions", None)
+    reaction_list = reactions.reactions
     if not reaction_list:
         return ""
-    parts = []
+    parts: list[str] = []
+    append = parts.append
     for r in reaction_list:
-        emoji = getattr(r, "emoji", "") or ""
-        count = getattr(r, "count", 0)
+        emoji = r.emoji
         if emoji:
-            parts.append(f"{emoji}×{count}")
+            append(f"{emoji}×{r.count}")
     return "  ".join(parts)
 
 
+_CHAT_TYPE_MAP: dict[ChatType, str] = {
+    ChatType.CHANNEL:    "channel",
+    ChatType.SUPERGROUP: "supergroup",
+    ChatType.GROUP:      "group",
+    ChatType.PRIVATE:    "private",
+}
+
+
 def parse_message_pyrogram(msg: Message) -> ParsedPost:
-    text = msg.text or msg.caption or ""
-    entities = msg.entities or msg.caption_entities or []
+    # Each property is read once; captions only when there is no text
+    text = msg.text
+    if text is None:
+        text = msg.caption or ""
+    entities = msg.entities
+    if entities is None:
+        entities = msg.caption_entities or []
 
     ent = _extract_entities_pyrogram(text, entities)
-    reg = _extract_regex(text)
+    reg = _extract_regex(text, ent)
 
     # Chat info
     chat = msg.chat
@@ -416,14 +509,8 @@ def parse_message_pyrogram(msg: Message) -> ParsedPost:
     chat_username = chat.username or ""
     chat_id = chat.id
 
-    type_map = {
-        ChatType.CHANNEL:    "channel",
-        ChatType.SUPERGROUP: "supergroup",
-        ChatType.GROUP:      "group",
-        ChatType.PRIVATE:    "private",
-    }
-    chat_type = type_map.get(chat.type, "unknown")
-    if chat_type == "private":
+    chat_type = _CHAT_TYPE_MAP.get(chat.type, "unknown")
+    if chat.type is ChatType.PRIVATE:
         chat_title = f"{chat.first_name or ''} {chat.last_name or ''}".strip()
 
     # Sender
@@ -470,7 +557,7 @@ def parse_message_pyrogram(msg: Message) -> ParsedPost:
         raw_text         = text,
         text_length      = len(text),
         urls             = _merge(ent["urls"],     reg["urls"]),
-        hashtags         = _merge(ent["hashtags"], reg["hashtags"]),
+        hashtags         = _merge(ent["hashtags"], reg["hashtags"], casefold=False),
         mentions         = _merge(ent["mentions"], reg["mentions"]),
         emails           = _merge(ent["emails"],   reg["emails"]),
         phones           = _merge(ent["phones"],   reg["phones"]),
@@ -503,43 +590,49 @@ def parse_message_pyrogram(msg: Message) -> ParsedPost:
 # JSON logger
 # ═══════════════════════════════════════════════════════════════════════════
 
+_json_log = JsonLogWriter(JSON_LOG_PATH)
+
+
 def save_json(post: ParsedPost) -> None:
-    if not JSON_LOG_PATH:
-        return
-    try:
-        with open(JSON_LOG_PATH, "a", encoding="utf-8") as fh:
-            json.dump(asdict(post), fh, ensure_ascii=False)
-            fh.write("\n")
-    except OSError as exc:
-        logger.error("JSON write failed: %s", exc)
+    """Queue *post* for the background JSON writer."""
+    _json_log.save(post)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Client & handler
 # ═══════════════════════════════════════════════════════════════════════════
 
-app = Client(
-    SESSION_NAME,
-    api_id=API_ID,
-    api_hash=API_HASH,
-    phone_number=PHONE or None,
-)
-
 # Build the chat filter
 _chat_filter = filters.chat(WATCH_CHATS) if WATCH_CHATS else filters.all
 _combined_filter = _chat_filter & ~filters.service
 
 
-@app.on_message(_combined_filter)
+def build_client() -> Client:
+    """
+    Client with the message handler registered.  Pyrogram binds the event
+    loop current at construction, so call this inside the running loop.
+    """
+    app = Client(
+        SESSION_NAME,
+        api_id=API_ID,
+        api_hash=API_HASH,
+        phone_number=PHONE or None,
+    )
+    app.add_handler(MessageHandler(on_new_message, _combined_filter))
+    return app
+
+
 async def on_new_message(client_: Client, message: Message) -> None:
     """Fires on every new message in monitored chats."""
 
-    logger.info(
-        "📩  msg #%s  in chat %s  media=%s",
-        message.id,
-        message.chat.id,
-        message.media or "text",
-    )
+    verbose = logger.isEnabledFor(logging.INFO)
+    if verbose:
+        logger.info(
+            "📩  msg #%s  in chat %s  media=%s",
+            message.id,
+            message.chat.id,
+            message.media or "text",
+        )
 
     try:
         parsed = parse_message_pyrogram(message)
@@ -549,36 +642,33 @@ async def on_new_message(client_: Client, message: Message) -> None:
 
     save_json(parsed)
 
-    logger.info(
-        "    ├─ [%s] «%s»  text=%d  urls=%d  tags=%d",
-        parsed.chat_type,
-        parsed.chat_title[:30],
-        parsed.text_length,
-        len(parsed.urls),
-        len(parsed.hashtags),
-    )
-    logger.info(
-        "    └─ media=%s  views=%s  reactions=%s",
-        parsed.media_type or "—",
-        parsed.views if parsed.views is not None else "—",
-        parsed.reactions_summary or "—",
-    )
-
-    if LOG_CHAT:
+    # Skip building the log arguments when INFO is filtered out
+    if verbose:
+        logger.info(
+            "    ├─ [%s] «%s»  text=%d  urls=%d  tags=%d",
+            parsed.chat_type,
+            parsed.chat_title[:30],
+            parsed.text_length,
+            len(parsed.urls),
+            len(parsed.hashtags),
+        )
+        logger.info(
+            "    └─ media=%s  views=%s  reactions=%s",
+            parsed.media_type or "—",
+            parsed.views if parsed.views is not None else "—",
+            parsed.reactions_summary or "—",
+        )
+
+    if _LOG_CHAT_TARGET is not None:
         try:
-            target: int | str
-            try:
-                target = int(LOG_CHAT)
-            except ValueError:
-                target = LOG_CHAT
             await client_.send_message(
-                target,
+                _LOG_CHAT_TARGET,
                 parsed.to_html(),
                 disable_web_page_preview=True,
             )
         except Exception as exc:
             logger.error("Send to log chat failed: %s", exc)
-    else:
+    elif _STDOUT_IS_TTY:
         print(parsed.to_html())
 
 
@@ -586,24 +676,47 @@ async def on_new_message(client_: Client, message: Message) -> None:
 # Bootstrap
 # ═══════════════════════════════════════════════════════════════════════════
 
-def main() -> None:
+async def _amain() -> None:
     if not API_ID or not API_HASH:
         logger.error("❌  Set API_ID and API_HASH (from https://my.telegram.org)")
         return
 
+    if LOG_CHAT:
+        output = LOG_CHAT
+    elif _STDOUT_IS_TTY:
+        output = "(console)"
+    else:
+        output = "(off: stdout is not a terminal)"
     logger.info(
         "🚀  Starting Pyrogram userbot parser…\n"
         "    SESSION   = %s\n"
         "    LOG_CHAT  = %s\n"
         "    WATCH     = %s\n"
-        "    JSON_LOG  = %s",
+        "    JSON_LOG  = %s\n"
+        "    LOG_LEVEL = %s",
         SESSION_NAME,
-        LOG_CHAT or "(console)",
+        output,
         WATCH_CHATS or "(all chats)",
         JSON_LOG_PATH or "(off)",
+        logging.getLevelName(logger.getEffectiveLevel()),
     )
 
-    app.run()
+    try:
+        async with build_client():
+            await idle()
+    finally:
+        await _json_log.close()
+
+
+def main() -> None:
+    """Run the parser on uvloop when it is installed, asyncio otherwise."""
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed; using default asyncio loop")
+        asyncio.run(_amain())
+    else:
+        uvloop.run(_amain())
 
 
 if __name__ == "__main__":
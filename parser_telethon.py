@@ -15,6 +15,7 @@ Extracted data
 
 Requirements:
     pip install telethon python-dotenv
+    pip install hyperscan        (optional, x86-64: faster regex fallback)
 
 First-run auth:
     The script will ask for your phone number and the code Telegram sends.
@@ -33,18 +34,26 @@ from __future__ import annotations
 from tz_helper import format_dt, format_iso
 import asyncio
 import html
-import json
 import logging
 import os
 import re
-from dataclasses import asdict, dataclass, field
+import time
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timezone
+from functools import lru_cache, partial
+from itertools import chain
 from typing import Optional
-from media_downloader_telethon import download_and_attach, MediaResult
+from json_log import JsonLogWriter
+from media_downloader_telethon import download_and_attach_nowait, MediaResult, send_text
 from telethon import TelegramClient, events
 from telethon.tl.types import (
     Channel,
     Chat,
+    DocumentAttributeAnimated,
+    DocumentAttributeAudio,
+    DocumentAttributeFilename,
+    DocumentAttributeSticker,
+    DocumentAttributeVideo,
     MessageEntityBold,
     MessageEntityCode,
     MessageEntityEmail,
@@ -79,6 +88,11 @@ try:
 except ImportError:
     pass
 
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Configuration
 # ═══════════════════════════════════════════════════════════════════════════
@@ -108,27 +122,85 @@ if _raw.strip():
 # Optional JSON-lines log file
 JSON_LOG_PATH: str = os.getenv("JSON_LOG_PATH", "")
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)-8s | %(name)s — %(message)s",
+class _SecondCachedFormatter(logging.Formatter):
+    """Formatter that runs strftime once per wall-clock second, not per record."""
+
+    _last_sec = -1
+    _last_str = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_sec = sec
+            self._last_str = time.strftime("%Y-%m-%d %H:%M:%S", self.converter(sec))
+        return f"{self._last_str},{int(record.msecs):03d}"
+
+
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(
+    _SecondCachedFormatter("%(asctime)s | %(levelname)-8s | %(name)s — %(message)s")
 )
+logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
 logger = logging.getLogger("telethon_parser")
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Regex fallbacks
 # ═══════════════════════════════════════════════════════════════════════════
+# Stdlib re on purpose: re2 and `regex` were slower on posts with matches.
 RE_URL     = re.compile(r"https?://[^\s<>\"']+", re.I)
 RE_EMAIL   = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
-RE_PHONE   = re.compile(r"\+?[(]?[0-9]{1,4}[)]?[-\s./0-9]{6,15}")
+# Starts on a digit, "+" or "(" not glued to a word, ends on a digit; matches
+# with fewer than _PHONE_MIN_DIGITS digits are dropped after the scan.
+# Separators are horizontal spaces only (tab and Unicode Zs), so digits on
+# adjacent lines never join.  They are literal characters rather than \s,
+# so the Hyperscan copy of the pattern matches exactly what re matches.
+_PHONE_SEP = "\t \xa0\u1680\u2000-\u200a\u202f\u205f\u3000"
+RE_PHONE   = re.compile(r"(?<![\w.+])\+?\(?\d[\d" + _PHONE_SEP + r"().\-]{5,18}\d(?!\w)")
 RE_HASHTAG = re.compile(r"#[A-Za-zА-Яа-яёЁІіЇїЄєҐґ0-9_]+")
 RE_MENTION = re.compile(r"@[A-Za-z0-9_]{3,}")
 
+_PHONE_MIN_DIGITS = 7
+_HAS_DIGIT = re.compile(r"\d").search
+
+# Optional Hyperscan prefilter: one SIMD pass over the text reports which
+# of the patterns occur at all; only those are then run through re, so
+# results are identical to the plain re path.
+_HS_PATTERNS = (RE_URL, RE_EMAIL, RE_PHONE, RE_HASHTAG, RE_MENTION)
+_HS_DB = None
+_HS_SCRATCH = None
+if hyperscan is not None:
+    try:
+        _flags = (
+            hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH
+        )
+        _HS_DB = hyperscan.Database()
+        _HS_DB.compile(
+            expressions=[p.pattern.encode() for p in _HS_PATTERNS],
+            ids=list(range(len(_HS_PATTERNS))),
+            # RE_PHONE's lookarounds need prefilter mode (a superset match)
+            flags=[
+                _flags | hyperscan.HS_FLAG_CASELESS,
+                _flags,
+                _flags | hyperscan.HS_FLAG_PREFILTER,
+                _flags,
+                _flags,
+            ],
+        )
+        # Scans run synchronously on the event loop thread, so one
+        # scratch space is never used by two scans at once.
+        _HS_SCRATCH = hyperscan.Scratch(_HS_DB)
+    except Exception as exc:
+        logger.warning("Hyperscan unavailable, using re only: %s", exc)
+        _HS_DB = None
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Data model
 # ═══════════════════════════════════════════════════════════════════════════
-@dataclass
+@dataclass(slots=True)
 class ParsedPost:
     """All information extracted from one message."""
 
@@ -189,35 +261,41 @@ class ParsedPost:
     public_link: str = ""
 
     # ──────────────────────────────────────────────────────────────────────
+    def to_dict(self) -> dict:
+        """Shallow field → value mapping; lists are shared, not copied."""
+        return {name: getattr(self, name) for name in _FIELDS}
+
     def to_html(self) -> str:
-        sec: list[str] = []
-        sec.append(f"<b>📨 New Parsed Message </b>\n")
+        esc = _esc
+        buf: list[str] = []
+        w = buf.append
+        w(f"<b>📨 New Parsed Message </b>\n")
 
-        sec.append("<b>📝 Text: </b>")
+        w("<b>📝 Text: </b>")
         if self.raw_text:
             preview = self.raw_text[:1000] + ("…" if len(self.raw_text) > 1000 else "")
-            sec.append(f"<pre>{_esc(preview)}</pre>")
+            w(f"<pre>{esc(preview)}</pre>")
         else:
-            sec.append("<i>— no text —</i>")
+            w("<i>— no text —</i>")
 
         # source
         title = self.chat_title or "DM"
-        sec.append(f"\n<b>📡 {_esc(self.chat_type).capitalize()}: </b> <a href='https://t.me/{self.chat_username}'>{_esc(title)}</a>")
-        # sec.append(f"<b>🆔 ID:</b>  <code>{self.chat_id}</code> / msg <code>{self.message_id}</code>")
+        w(f"\n<b>📡 {esc(self.chat_type).capitalize()}: </b> <a href='https://t.me/{self.chat_username}'>{esc(title)}</a>")
+        # w(f"<b>🆔 ID:</b>  <code>{self.chat_id}</code> / msg <code>{self.message_id}</code>")
         if self.date:
-            sec.append(f"<b>🕐 Date:</b> {_esc(self.date)[:16]}")
+            w(f"<b>🕐 Date:</b> {esc(self.date)[:16]}")
 
         # # sender
         # if self.sender_name:
         #     sn = self.sender_name
         #     if self.sender_username:
-        #         sn += f"  (@{_esc(self.sender_username)})"
-        #     sec.append(f"<b>👤 From:</b>  {_esc(sn)}")
+        #         sn += f"  (@{esc(self.sender_username)})"
+        #     w(f"<b>👤 From:</b>  {esc(sn)}")
 
         if self.forwarded_from:
-            sec.append(f"<b>↩️ Fwd:</b>  {_esc(self.forwarded_from)}")
+            w(f"<b>↩️ Fwd:</b>  {esc(self.forwarded_from)}")
         if self.reply_to_message_id:
-            sec.append(f"<b>💬 Reply to:</b>  #{self.reply_to_message_id}")
+            w(f"<b>💬 Reply to:</b>  #{self.reply_to_message_id}")
 
         # # views / forwards
         # stats = []
@@ -226,53 +304,78 @@ class ParsedPost:
         # if self.forwards is not None:
         #     stats.append(f"🔁 {self.forwards}")
         # if stats:
-        #     sec.append(f"<b>📊 Stats:</b>  {'  |  '.join(stats)}")
+        #     w(f"<b>📊 Stats:</b>  {'  |  '.join(stats)}")
 
         # text
-        # sec.append("")
+        # w("")
 
 
         # entities
-        sec += _render_list("🔗 URLs",       self.urls,               limit=12)
-        sec += _render_tags("#️⃣ Hashtags",   self.hashtags)
-        sec += _render_tags("👤 Mentions",    self.mentions)
-        sec += _render_list("✉️ Emails",     self.emails)
-        # sec += _render_list("📞 Phones",     self.phones)
-        sec += _render_list("🅱️ Bold",       self.bold_texts,          limit=8, trim=100)
-        sec += _render_list("🔤 Italic",     self.italic_texts,        limit=8, trim=100)
-        sec += _render_list("⎁ Underline",   self.underline_texts,     limit=6, trim=100)
-        sec += _render_list("🪧 Strike",     self.strikethrough_texts,  limit=6, trim=100)
-        sec += _render_code("💻 Code",       self.code_fragments,       limit=5)
-        sec += _render_list("🫣 Spoiler",    self.spoiler_texts,        limit=5, trim=80)
+        _render_list(buf, "🔗 URLs",       self.urls,               limit=12)
+        _render_tags(buf, "#️⃣ Hashtags",   self.hashtags)
+        _render_tags(buf, "👤 Mentions",    self.mentions)
+        _render_list(buf, "✉️ Emails",     self.emails)
+        # _render_list(buf, "📞 Phones",     self.phones)
+        _render_list(buf, "🅱️ Bold",       self.bold_texts,          limit=8, trim=100)
+        _render_list(buf, "🔤 Italic",     self.italic_texts,        limit=8, trim=100)
+        _render_list(buf, "⎁ Underline",   self.underline_texts,     limit=6, trim=100)
+        _render_list(buf, "🪧 Strike",     self.strikethrough_texts,  limit=6, trim=100)
+        _render_code(buf, "💻 Code",       self.code_fragments,       limit=5)
+        _render_list(buf, "🫣 Spoiler",    self.spoiler_texts,        limit=5, trim=80)
 
 
         if self.has_webpage_preview and self.webpage_url:
-            sec.append(f"<b>🌐 Preview:</b>  {_esc(self.webpage_url)}")
+            w(f"<b>🌐 Preview:</b>  {esc(self.webpage_url)}")
 
         if self.downloaded_path:
-            sec.append(f"<b>💾 Saved:</b>  <code>{_esc(self.downloaded_path)}</code>")
+            w(f"<b>💾 Saved:</b>  <code>{esc(self.downloaded_path)}</code>")
         if self.download_method:
-            sec.append(f"<b>📤 Attach:</b>  {_esc(self.download_method)}")
+            w(f"<b>📤 Attach:</b>  {esc(self.download_method)}")
 
         if self.grouped_id:
-            sec.append(f"<b>🗂 Album:</b>  <code>{self.grouped_id}</code>")
+            w(f"<b>🗂 Album:</b>  <code>{self.grouped_id}</code>")
 
         # if self.reactions_summary:
-        #     sec.append(f"<b>❤️ Reactions:</b>  {_esc(self.reactions_summary)}")
+        #     w(f"<b>❤️ Reactions:</b>  {esc(self.reactions_summary)}")
 
         # link to original (public channels)
         if self.chat_username:
             link = f"https://t.me/{self.chat_username}/{self.message_id}"
-            sec.append("")
-            sec.append(f'<a href="{link}">🔗 Open original</a>')
+            w("")
+            w(f'<a href="{link}">🔗 Open original</a>')
 
-        return "\n".join(sec)
+        return "\n".join(buf)
+
+
+# Field names in declaration order, for ParsedPost.to_dict()
+_FIELDS: tuple[str, ...] = tuple(f.name for f in fields(ParsedPost))
 
 
 # ── helpers ───────────────────────────────────────────────────────────────
 
+_HTML_SPECIAL = frozenset("&<>\"'")
+
+# Chat titles, usernames, tags and links repeat across messages, so short
+# strings are escaped through a cache.  Longer ones (text previews) are
+# mostly unique and would only evict the hot entries.
+_ESC_CACHE_MAX_LEN = 256
+
+
+def _escape(s: str) -> str:
+    # Most titles and names contain nothing to escape
+    if _HTML_SPECIAL.isdisjoint(s):
+        return s
+    return html.escape(s)
+
+
+_escape_cached = lru_cache(maxsize=8192)(_escape)
+
+
 def _esc(t: str) -> str:
-    return html.escape(str(t))
+    s = t if type(t) is str else str(t)
+    if len(s) > _ESC_CACHE_MAX_LEN:
+        return _escape(s)
+    return _escape_cached(s)
 
 
 def _fmt_size(b: int) -> str:
@@ -283,32 +386,34 @@ def _fmt_size(b: int) -> str:
     return f"{b:.1f} TB"
 
 
-def _render_list(label: str, items: list[str], *, limit: int = 10, trim: int = 0) -> list[str]:
+def _render_list(buf: list[str], label: str, items: list[str], *, limit: int = 10, trim: int = 0) -> None:
     if not items:
-        return []
-    out = ["", f"<b>{label} ({len(items)}):</b>"]
+        return
+    w = buf.append
+    w("")
+    w(f"<b>{label} ({len(items)}):</b>")
     for it in items[:limit]:
         t = it[:trim] + "…" if trim and len(it) > trim else it
-        out.append(f"  • {_esc(t)}")
+        w(f"  • {_esc(t)}")
     if len(items) > limit:
-        out.append(f"  <i>… +{len(items) - limit} more</i>")
-    return out
+        w(f"  <i>… +{len(items) - limit} more</i>")
 
 
-def _render_tags(label: str, items: list[str]) -> list[str]:
+def _render_tags(buf: list[str], label: str, items: list[str]) -> None:
     if not items:
-        return []
-    return ["", f"<b>{label} ({len(items)}):</b>",
-            "  " + "  ".join(_esc(i) for i in items)]
+        return
+    buf.extend(("", f"<b>{label} ({len(items)}):</b>",
+                "  " + "  ".join(_esc(i) for i in items)))
 
 
-def _render_code(label: str, items: list[str], *, limit: int = 5) -> list[str]:
+def _render_code(buf: list[str], label: str, items: list[str], *, limit: int = 5) -> None:
     if not items:
-        return []
-    out = ["", f"<b>{label} ({len(items)}):</b>"]
+        return
+    w = buf.append
+    w("")
+    w(f"<b>{label} ({len(items)}):</b>")
     for c in items[:limit]:
-        out.append(f"  • <code>{_esc(c[:120])}</code>")
-    return out
+        w(f"  • <code>{_esc(c[:120])}</code>")
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -344,42 +449,102 @@ def _extract_entities(text: str, entities: list | None) -> dict[str, list[str]]:
     if not entities or not text:
         return buckets
 
+    get = _ENTITY_MAP.get
     for ent in entities:
-        bucket = _ENTITY_MAP.get(type(ent))
+        cls = type(ent)
+        bucket = get(cls)
         if bucket is None:
             continue
 
-        fragment = text[ent.offset : ent.offset + ent.length]
-
-        if isinstance(ent, MessageEntityTextUrl):
-            buckets["urls"].append(ent.url or fragment)
-        elif isinstance(ent, MessageEntityMentionName):
+        # The map is keyed by exact type, so identity checks suffice here;
+        # inline branches beat a per-class extractor-function table.
+        if cls is MessageEntityTextUrl:
+            o = ent.offset
+            buckets["urls"].append(ent.url or text[o : o + ent.length])
+        elif cls is MessageEntityMentionName:
             buckets["mentions"].append(f"id:{ent.user_id}")
         else:
-            buckets[bucket].append(fragment)
+            o = ent.offset
+            buckets[bucket].append(text[o : o + ent.length])
 
     return buckets
 
 
-def _extract_regex(text: str) -> dict[str, list[str]]:
+# Shared read-only result for messages without text
+_EMPTY_BUCKETS: dict[str, tuple[()]] = {k: () for k in _ALL_BUCKETS}
+
+_REGEX_BUCKETS = frozenset(("urls", "hashtags", "mentions", "emails", "phones"))
+
+
+def _extract_regex(
+    text: str,
+    needed: frozenset[str] | set[str] = _REGEX_BUCKETS,
+) -> dict[str, list[str]]:
+    """
+    Regex fallback for the buckets in *needed*; the rest come back empty.
+    Patterns whose literal trigger is absent from *text* are not run.
+    """
+    # Plain substring tests; an Aho-Corasick pass was no faster here.
+    url = "urls" in needed and "://" in text         # RE_URL is case-insensitive
+    tag = "hashtags" in needed and "#" in text
+    mention = "mentions" in needed and "@" in text
+    email = "emails" in needed and "@" in text
+    phone = "phones" in needed and _HAS_DIGIT(text) is not None
+    if _HS_DB is not None and (url or tag or mention or email or phone):
+        hs_url, hs_email, hs_phone, hs_tag, hs_mention = _hs_present(text)
+        url, email, phone = url and hs_url, email and hs_email, phone and hs_phone
+        tag, mention = tag and hs_tag, mention and hs_mention
     return {
-        "urls":     RE_URL.findall(text),
-        "hashtags": RE_HASHTAG.findall(text),
-        "mentions": RE_MENTION.findall(text),
-        "emails":   RE_EMAIL.findall(text),
-        "phones":   RE_PHONE.findall(text),
+        "urls":     RE_URL.findall(text) if url else [],
+        "hashtags": RE_HASHTAG.findall(text) if tag else [],
+        "mentions": RE_MENTION.findall(text) if mention else [],
+        "emails":   RE_EMAIL.findall(text) if email else [],
+        "phones":   _find_phones(text) if phone else [],
     }
 
 
+def _find_phones(text: str) -> list[str]:
+    """
+    Phone-like runs in *text* with at least _PHONE_MIN_DIGITS digits.
+
+    >>> _find_phones("call +1 (555) 123-4567")
+    ['+1 (555) 123-4567']
+    >>> _find_phones("order 12345\\n6789012")
+    ['6789012']
+    """
+    return [
+        p for p in RE_PHONE.findall(text)
+        if sum(c.isdigit() for c in p) >= _PHONE_MIN_DIGITS
+    ]
+
+
+def _hs_present(text: str) -> list[bool]:
+    """Which of _HS_PATTERNS occur in *text*, in one Hyperscan scan."""
+    hits = [False] * len(_HS_PATTERNS)
+
+    def on_match(pid: int, start: int, end: int, flags: int, ctx) -> None:
+        hits[pid] = True
+
+    try:
+        data = text.encode("utf-8")
+    except UnicodeEncodeError:
+        # Lone surrogates are not valid UTF-8 for the database; let re decide
+        return [True] * len(_HS_PATTERNS)
+    _HS_DB.scan(data, match_event_handler=on_match, scratch=_HS_SCRATCH)
+    return hits
+
+
 def _merge(a: list[str], b: list[str]) -> list[str]:
-    seen: set[str] = set()
-    out: list[str] = []
-    for item in a + b:
-        key = item.strip().lower()
-        if key and key not in seen:
-            seen.add(key)
-            out.append(item.strip())
-    return out
+    """Stripped items of *a* then *b*, first spelling kept per lowercase key."""
+    seen: dict[str, str] = {}
+    for item in chain(a, b):
+        k = item.strip()
+        if not k:
+            continue
+        lk = k.lower()
+        if lk not in seen:
+            seen[lk] = k
+    return list(seen.values())
 
 
 def _detect_media(message) -> tuple[str, str, int, int, str]:
@@ -392,7 +557,7 @@ def _detect_media(message) -> tuple[str, str, int, int, str]:
         sz = 0
         if ph and ph.sizes:
             sz = getattr(ph.sizes[-1], "size", 0) or 0
-        return ("photo", sz, "", 0, "image/jpeg")
+        return ("photo", "", sz, 0, "image/jpeg")
 
     if isinstance(media, MessageMediaDocument):
         doc = media.document
@@ -404,37 +569,36 @@ def _detect_media(message) -> tuple[str, str, int, int, str]:
         fname = ""
         duration = 0
 
+        # Classify in a single pass over the attributes
+        is_animated = is_sticker = is_video = is_audio = False
+        round_msg = is_voice = False
         for attr in doc.attributes:
-            cls_name = type(attr).__name__
-            if hasattr(attr, "file_name") and attr.file_name:
-                fname = attr.file_name
-            if hasattr(attr, "duration"):
+            if isinstance(attr, DocumentAttributeFilename):
+                fname = attr.file_name or fname
+            elif isinstance(attr, DocumentAttributeVideo):
+                is_video = True
+                round_msg = round_msg or bool(attr.round_message)
                 duration = attr.duration or 0
+            elif isinstance(attr, DocumentAttributeAudio):
+                is_audio = True
+                is_voice = is_voice or bool(attr.voice)
+                duration = attr.duration or 0
+            elif isinstance(attr, DocumentAttributeAnimated):
+                is_animated = True
+            elif isinstance(attr, DocumentAttributeSticker):
+                is_sticker = True
 
         # Classify by mime / attributes
         if "video" in mime and not getattr(media, "round", False):
-            if any(type(a).__name__ == "DocumentAttributeAnimated" for a in doc.attributes):
+            if is_animated:
                 mtype = "gif"
-            elif any(type(a).__name__ == "DocumentAttributeVideo" for a in doc.attributes):
-                round_msg = any(
-                    getattr(a, "round_message", False)
-                    for a in doc.attributes
-                    if type(a).__name__ == "DocumentAttributeVideo"
-                )
+            elif is_video:
                 mtype = "video_note" if round_msg else "video"
             else:
                 mtype = "video"
         elif "audio" in mime:
-            if any(type(a).__name__ == "DocumentAttributeAudio" for a in doc.attributes):
-                is_voice = any(
-                    getattr(a, "voice", False)
-                    for a in doc.attributes
-                    if type(a).__name__ == "DocumentAttributeAudio"
-                )
-                mtype = "voice" if is_voice else "audio"
-            else:
-                mtype = "audio"
-        elif any(type(a).__name__ == "DocumentAttributeSticker" for a in doc.attributes):
+            mtype = "voice" if is_audio and is_voice else "audio"
+        elif is_sticker:
             mtype = "sticker"
         else:
             mtype = "document"
@@ -458,6 +622,31 @@ def _detect_media(message) -> tuple[str, str, int, int, str]:
     return ("other", "", 0, 0, "")
 
 
+# peer id → (entity, expires_at) for chats, senders and forward sources.
+# Bounded (oldest evicted first); entries expire so renames show up.
+_ENTITY_CACHE_SIZE = 4096
+_ENTITY_TTL: float = float(os.getenv("ENTITY_TTL", "3600"))
+_chat_cache: dict[int, tuple[object, float]] = {}
+_sender_cache: dict[int, tuple[object, float]] = {}
+_entity_cache: dict[int, tuple[object, float]] = {}
+
+
+def _cache_get(cache: dict[int, tuple[object, float]], key: int | None):
+    hit = cache.get(key)
+    if hit is not None and hit[1] > time.monotonic():
+        return hit[0]
+    return None
+
+
+def _cache_put(cache: dict[int, tuple[object, float]], key: int | None, value) -> None:
+    if key is None or value is None:
+        return
+    cache.pop(key, None)
+    if len(cache) >= _ENTITY_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = (value, time.monotonic() + _ENTITY_TTL)
+
+
 async def _resolve_forward(message) -> tuple[str, str | None]:
     """Return (forward_from_name, forward_date_iso)."""
     fwd = message.forward
@@ -465,15 +654,21 @@ async def _resolve_forward(message) -> tuple[str, str | None]:
         return ("", None)
 
     name = ""
-    if fwd.sender_id:
+    # sender_id is set for forwards from users, chat_id for channel posts
+    src_id = fwd.sender_id or fwd.chat_id
+    if src_id:
         try:
-            entity = await message.client.get_entity(fwd.sender_id)
+            # Telethon attaches the source entity when the update carried it
+            entity = fwd.sender or fwd.chat or _cache_get(_entity_cache, src_id)
+            if entity is None:
+                entity = await message.client.get_entity(src_id)
+                _cache_put(_entity_cache, src_id, entity)
             if isinstance(entity, User):
                 name = f"{entity.first_name or ''} {entity.last_name or ''}".strip()
             elif isinstance(entity, Channel):
                 name = entity.title or ""
         except Exception:
-            name = f"id:{fwd.sender_id}"
+            name = f"id:{src_id}"
     elif fwd.from_name:
         name = fwd.from_name
 
@@ -502,17 +697,59 @@ def _get_reactions(message) -> str:
     return "  ".join(parts)
 
 
+async def _get_chat(message):
+    chat = _cache_get(_chat_cache, message.chat_id)
+    if chat is None:
+        chat = await message.get_chat()
+        _cache_put(_chat_cache, message.chat_id, chat)
+    return chat
+
+
+async def _get_sender(message):
+    sender = _cache_get(_sender_cache, message.sender_id)
+    if sender is None:
+        sender = await message.get_sender()
+        _cache_put(_sender_cache, message.sender_id, sender)
+    return sender
+
+
+def _gathered(value, default, what: str, message):
+    """Unwrap one asyncio.gather(return_exceptions=True) result."""
+    if isinstance(value, Exception):
+        logger.warning("Could not resolve %s for msg #%s: %s", what, message.id, value)
+        return default
+    if isinstance(value, BaseException):
+        raise value
+    return value
+
+
 async def parse_message(message) -> ParsedPost:
     """Telethon Message → ParsedPost."""
 
     text = message.text or ""
     entities = message.entities or []
 
-    ent = _extract_entities(text, entities)
-    reg = _extract_regex(text)
+    if text:
+        ent = _extract_entities(text, entities)
+        # Server-side entities already list what the user typed as links,
+        # tags, …; only fall back to regex for the kinds they left empty.
+        reg = _extract_regex(text, {b for b in _REGEX_BUCKETS if not ent[b]})
+    else:
+        # Captionless media: nothing to extract
+        ent = reg = _EMPTY_BUCKETS
+
+    # Chat, sender and forward source are independent lookups: overlap them
+    chat, sender, fwd = await asyncio.gather(
+        _get_chat(message),
+        _get_sender(message),
+        _resolve_forward(message),
+        return_exceptions=True,
+    )
+    chat = _gathered(chat, None, "chat", message)
+    sender = _gathered(sender, None, "sender", message)
+    fn, fd = _gathered(fwd, ("", None), "forward", message)
 
     # Chat info
-    chat = await message.get_chat()
     chat_title = getattr(chat, "title", "") or ""
     chat_username = getattr(chat, "username", "") or ""
     chat_id = message.chat_id or 0
@@ -528,7 +765,6 @@ async def parse_message(message) -> ParsedPost:
         chat_type = "unknown"
 
     # Sender
-    sender = await message.get_sender()
     sender_name = ""
     sender_username = ""
     sender_id = None
@@ -552,9 +788,6 @@ async def parse_message(message) -> ParsedPost:
         mtype = ""
         mmime = ""
 
-    # Forward
-    fn, fd = await _resolve_forward(message)
-
     # # # Reactions
     # reactions = _get_reactions(message)
 
@@ -605,15 +838,29 @@ async def parse_message(message) -> ParsedPost:
 # JSON logger
 # ═══════════════════════════════════════════════════════════════════════════
 
+_json_log = JsonLogWriter(JSON_LOG_PATH)
+
+
 def save_json(post: ParsedPost) -> None:
-    if not JSON_LOG_PATH:
-        return
-    try:
-        with open(JSON_LOG_PATH, "a", encoding="utf-8") as fh:
-            json.dump(asdict(post), fh, ensure_ascii=False)
-            fh.write("\n")
-    except OSError as exc:
-        logger.error("JSON write failed: %s", exc)
+    """Queue *post* for the background JSON writer."""
+    _json_log.save(post)
+
+
+def _on_media_done(parsed: ParsedPost, task: asyncio.Task) -> None:
+    """Copy the download outcome of *task* onto *parsed*, then save it."""
+    exc = None if task.cancelled() else task.exception()
+    if exc is not None:
+        logger.error("Media handling failed for msg #%s: %s", parsed.message_id, exc)
+    elif not task.cancelled():
+        result: MediaResult = task.result()
+        parsed.downloaded_path = result.file_path or ""
+        parsed.download_method = result.method
+        parsed.public_link = result.public_link
+        logger.info(
+            "    └─ media: %s  method=%s  path=%s",
+            result.media_type, result.method, result.file_path or "—",
+        )
+    save_json(parsed)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -660,24 +907,17 @@ async def on_new_message(event: events.NewMessage.Event) -> None:
             target = LOG_CHAT
 
         if message.media:
-            result: MediaResult = await download_and_attach(
+            # Don't hold the handler for the transfer; the post is saved
+            # once its media has been sent
+            task = download_and_attach_nowait(
                 client, message, parsed.to_html(), target,
             )
-            # Update parsed post with download info
-            parsed.downloaded_path = result.file_path or ""
-            parsed.download_method = result.method
-            parsed.public_link = result.public_link
-            logger.info(
-                "    └─ media: %s  method=%s  path=%s",
-                result.media_type, result.method, result.file_path or "—",
-            )
+            task.add_done_callback(partial(_on_media_done, parsed))
+            return
         else:
-            # No media — just send the text summary
+            # No media — queue the summary; bursts go out as one message
             try:
-                await client.send_message(
-                    target, parsed.to_html(),
-                    parse_mode="html", link_preview=False,
-                )
+                await send_text(client, target, parsed.to_html())
             except Exception as exc:
                 logger.error("Send failed: %s", exc)
     else:
@@ -710,7 +950,10 @@ async def main() -> None:
     logger.info("✅  Logged in as %s (id=%s)", me.first_name, me.id)
 
     logger.info("👂  Listening for new messages…  Press Ctrl+C to stop.")
-    await client.run_until_disconnected()
+    try:
+        await client.run_until_disconnected()
+    finally:
+        await _json_log.close()
 
 
 if __name__ == "__main__":
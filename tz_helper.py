@@ -31,6 +31,7 @@ from __future__ import annotations
 
 import os
 from datetime import datetime, timezone
+from functools import lru_cache
 from zoneinfo import ZoneInfo, available_timezones
 
 try:
@@ -119,17 +120,26 @@ def format_dt(
         return "(no date)"
 
     fmt = fmt or _date_fmt
-    local = to_local(dt)
-    result = local.strftime(fmt)
+    utc_dt = dt if dt.tzinfo else dt.replace(tzinfo=UTC)
+    if dt.microsecond:
+        result = to_local(dt).strftime(fmt)
+    else:
+        # Telegram dates are whole seconds: memoize per (second, format)
+        result = _format_ts(int(utc_dt.timestamp()), fmt)
 
     if include_utc:
-        utc_dt = dt if dt.tzinfo else dt.replace(tzinfo=UTC)
         utc_str = utc_dt.astimezone(UTC).strftime("%H:%M UTC")
         result += f"  ({utc_str})"
 
     return result
 
 
+@lru_cache(maxsize=4096)
+def _format_ts(ts: int, fmt: str) -> str:
+    """Local-time strftime of a UTC epoch second, cached (albums share one)."""
+    return datetime.fromtimestamp(ts, LOCAL_TZ).strftime(fmt)
+
+
 def format_iso(dt: datetime | None) -> str:
     """Convert to local timezone and return ISO-8601 string."""
     if dt is None: